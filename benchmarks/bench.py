@@ -0,0 +1,382 @@
+# Offline benchmarks for the receive -> parse -> dispatch -> reply path.
+#
+#     python benchmarks/bench.py [--quick] [--output results.json]
+#
+# Everything runs against dotbotx.testing.LocalServer; no network is needed.
+# Results are printed (or written) as JSON so runs can be diffed between releases.
+# The "trace" benchmark replays a recorded hack.chat archive (see
+# dotbotx.archive.apply_recorder; a synthetic one is recorded if --trace is not
+# given) through the current HCMsg and through HCMsg as of --baseline, a git
+# revision (the latest tag by default), to show messages/s before and after.
+# Both sides decode with the stdlib json module, so only parsing is compared.
+# Import time is measured separately by benchmarks/importtime.py.
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotbotx.aio import AsyncHCConnector
+from dotbotx.archive import RECV, ArchiveReader, ArchiveWriter
+from dotbotx.codec import JSONCodec
+from dotbotx.core import Context
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.hub import Hub
+from dotbotx.idns import IDNSMsg
+from dotbotx.recv import Receiver
+from dotbotx.testing import LocalServer, hc_responder
+from dotbotx.xcore import XChatter
+
+HC_FRAMES = {
+    "chat": {"cmd": "chat", "nick": "alice", "trip": "abcdef", "color": "fff", "level": 100, "utype": "user", "hash": "h", "text": "hello there", "time": 0},
+    "emote": {"cmd": "emote", "nick": "alice", "trip": "abcdef", "text": "@alice waves", "time": 0},
+    "whisper": {"cmd": "info", "type": "whisper", "from": "alice", "trip": "abcdef", "text": "alice whispered: psst", "time": 0},
+    "changeNick": {"cmd": "info", "text": "alice is now bob", "time": 0},
+    "onlineAdd": {"cmd": "onlineAdd", "nick": "carol", "trip": "xyz", "hash": "h2", "utype": "user", "level": 100, "time": 0},
+    "onlineRemove": {"cmd": "onlineRemove", "nick": "carol", "time": 0},
+    "onlineSet": {
+        "cmd": "onlineSet",
+        "nicks": [f"user{i}" for i in range(200)],
+        "users": [{"nick": f"user{i}", "trip": "t", "hash": "h", "utype": "user", "level": 100, "userid": i} for i in range(200)],
+        "time": 0,
+    },
+}
+# Rough make-up of a busy channel: mostly chat, some joins/leaves and whispers.
+TRACE_MIX = {"chat": 80, "emote": 5, "whisper": 5, "changeNick": 1, "onlineAdd": 5, "onlineRemove": 4}
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IDNS_FRAMES = {
+    "message": {"type": "message", "message": {"messageId": 1, "name": "alice", "text": "hello", "type": "received"}},
+    "pong": {"type": "pong"},
+}
+
+
+def rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds else float("inf")
+
+
+def timed(func: Callable[[], Any], count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    return time.perf_counter() - started
+
+
+def bench_parse(n: int) -> Dict[str, Any]:
+    results = {}
+    for name, frame in HC_FRAMES.items():
+        raw = json.dumps(frame)
+
+        def parse():
+            msg = HCMsg(raw)
+            # What a typical handler touches, several times.
+            for _ in range(3):
+                msg.type, msg.text, msg.sender, msg.is_feedback
+
+        results[f"hc.{name}"] = rate(n, timed(parse, n))
+    for name, frame in IDNS_FRAMES.items():
+        raw = json.dumps(frame)
+
+        def parse_idns():
+            msg = IDNSMsg(raw, False)
+            for _ in range(3):
+                msg.type, msg.text, msg.sender, msg.is_feedback
+
+        results[f"idns.{name}"] = rate(n, timed(parse_idns, n))
+    return {"unit": "messages/s", "results": results}
+
+
+def record_trace(path: str, n: int):
+    # Stand-in for a real recording: the join burst, then n frames in TRACE_MIX
+    # proportions, written the way apply_recorder writes them.
+    rng = random.Random(0)
+    names = rng.choices(list(TRACE_MIX), list(TRACE_MIX.values()), k=n)
+    with ArchiveWriter(path) as writer:
+        writer.write(json.dumps(HC_FRAMES["onlineSet"]), RECV)
+        for name in names:
+            writer.write(json.dumps(HC_FRAMES[name]), RECV)
+
+
+def git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, check=True, text=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_tag() -> Optional[str]:
+    tag = git("describe", "--tags", "--abbrev=0")
+    return tag.strip() if tag else None
+
+
+def load_baseline_hcmsg(revision: str) -> Optional[type]:
+    # HCMsg as it was at `revision`, loaded next to the current dotbotx.hc so
+    # its relative imports resolve. None if git cannot find it.
+    source = git("show", f"{revision}:dotbotx/hc/__module.py")
+    if source is None:
+        return None
+    spec = importlib.util.spec_from_loader("dotbotx.hc._baseline", loader=None)
+    module = importlib.util.module_from_spec(spec)  # type: ignore
+    module.__package__ = "dotbotx.hc"
+    exec(compile(source, f"{revision}:dotbotx/hc/__module.py", "exec"), module.__dict__)
+    return module.HCMsg
+
+
+def bench_trace(n: int, trace: Optional[str], baseline: Optional[str]) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        if trace is None:
+            trace = os.path.join(tmp, "trace.dbx")
+            record_trace(trace, n)
+        with ArchiveReader(trace) as reader:
+            frames = [frame.data for frame in reader.frames(RECV)]
+
+    # Pin the stdlib codec: the baseline always used json.loads, and the
+    # faster default codec would otherwise be counted as a parsing win.
+    codec = JSONCodec()
+    impls: Dict[str, Callable[[str], Any]] = {"after": lambda raw: HCMsg(raw, codec)}
+    if baseline is None:
+        baseline = latest_tag()
+    if baseline:
+        before = load_baseline_hcmsg(baseline)
+        if before is not None:
+            impls["before"] = before
+
+    results: Dict[str, Any] = {"frames": len(frames)}
+    for label, parse in impls.items():
+
+        def replay():
+            for raw in frames:
+                msg = parse(raw)
+                for _ in range(3):
+                    msg.type, msg.text, msg.sender, msg.is_feedback
+
+        best = min(timed(replay, 1) for _ in range(3))
+        results[label] = rate(len(frames), best)
+    if "before" in results:
+        results["speedup"] = round(results["after"] / results["before"], 2)
+    return {"unit": "messages/s", "baseline": baseline, "results": results}
+
+
+def bench_frames(n: int) -> Dict[str, Any]:
+    # Full connector receive path; "chat_only" lets the connector skip frames
+    # nobody subscribed to.
+    results = {}
+    for mode in ("all", "chat_only"):
+        chatter = XChatter(HCConnector(), "bench", "bench")
+        if mode == "all":
+            chatter.on()(lambda ctx: None)
+        else:
+            chatter.on("chat")(lambda ctx: None)
+        on_message = chatter.connector.message_callback
+        for name in ("chat", "onlineSet"):
+            raw = json.dumps(HC_FRAMES[name])
+            results[f"{mode}.{name}"] = rate(n, timed(lambda: on_message(None, raw), n))  # type: ignore
+    return {"unit": "frames/s", "results": results}
+
+
+def bench_dispatch(n: int) -> Dict[str, Any]:
+    results = {}
+    message = HCMsg(json.dumps(HC_FRAMES["chat"]))
+    for handlers in (1, 50, 500):
+        chatter = XChatter(HCConnector(), "bench", "bench")
+        for _ in range(handlers):
+            chatter.on("chat")(lambda ctx: None)
+        ctx = Context(chatter, message)
+        count = max(10, n // handlers)
+        results[f"sync.{handlers}"] = rate(count, timed(lambda: chatter.message_callback(ctx), count))
+
+        async def run_async():
+            chatter = XChatter(HCConnector(), "bench", "bench")
+            chatter.loop = asyncio.get_running_loop()
+            chatter._submit = chatter.loop.create_task  # type: ignore
+
+            async def handler(ctx):
+                return None
+
+            for _ in range(handlers):
+                chatter.on("chat")(handler)
+            ctx = Context(chatter, message)
+            started = time.perf_counter()
+            for _ in range(count):
+                chatter.message_callback(ctx)
+                await asyncio.sleep(0)
+            return time.perf_counter() - started
+
+        results[f"async.{handlers}"] = rate(count, asyncio.run(run_async()))
+    return {"unit": "messages/s", "results": results}
+
+
+def bench_recv(n: int) -> Dict[str, Any]:
+    results = {}
+    message = HCMsg(json.dumps(HC_FRAMES["chat"]))
+    nick = message.sender.nick
+
+    async def run(waiters: int, bystanders: int) -> float:
+        receiver = Receiver()
+        ctx = Context(None, message)  # type: ignore
+        # Bystanders wait on other senders and must not slow delivery down.
+        idle = [asyncio.ensure_future(receiver.recv_ctx("chat", f"other{i}")) for i in range(bystanders)]
+        rounds = max(5, n // max(waiters, 1) // 10)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            tasks = [asyncio.ensure_future(receiver.recv_ctx("chat", nick)) for _ in range(waiters)]
+            await asyncio.sleep(0)
+            receiver.deliver(ctx)
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        for task in idle:
+            task.cancel()
+        await asyncio.gather(*idle, return_exceptions=True)
+        return rounds * waiters / elapsed
+
+    for waiters in (1, 10, 100, 1000):
+        results[f"waiters.{waiters}"] = round(asyncio.run(run(waiters, 0)), 1)
+    results["waiters.1.bystanders.1000"] = round(asyncio.run(run(1, 1000)), 1)
+    return {"unit": "deliveries/s", "results": results}
+
+
+def bench_send(n: int, server: LocalServer) -> Dict[str, Any]:
+    results = {}
+    for hooks in (0, 1, 10):
+        connector = HCConnector(server.url)
+        chatter = XChatter(connector, "bench-send", f"sender{hooks}")
+        for _ in range(hooks):
+            connector.send_hooks.append(lambda message: None)
+        connector.start(chatter.channel, chatter.nick)
+        while not connector.is_running or connector.ws.sock is None or not connector.ws.sock.connected:
+            time.sleep(0.01)
+        results[f"hooks.{hooks}"] = rate(n, timed(lambda: connector.send_dict({"cmd": "ping"}), n))
+        connector.quit()
+    return {"unit": "frames/s", "results": results}
+
+
+def bench_roundtrip(n: int, server: LocalServer) -> Dict[str, Any]:
+    # A peer chats, the bot replies; measures the full receive -> parse ->
+    # dispatch -> reply loop through a real socket.
+    done = threading.Event()
+    replies = [0]
+
+    bot = XChatter(HCConnector(server.url), "bench-rt", "bot")
+
+    @bot.on("chat")
+    def echo(ctx: Context):
+        if ctx.message.sender.nick == "peer":  # type: ignore
+            ctx.reply("pong")
+
+    peer = XChatter(HCConnector(server.url), "bench-rt", "peer")
+
+    @peer.on("chat")
+    def count(ctx: Context):
+        if ctx.message.sender.nick == "bot":  # type: ignore
+            replies[0] += 1
+            if replies[0] >= n:
+                done.set()
+            else:
+                ctx.reply("ping")
+
+    bot.connector.start(bot.channel, bot.nick)
+    peer.connector.start(peer.channel, peer.nick)
+    time.sleep(0.3)
+    started = time.perf_counter()
+    peer.chat("ping")
+    done.wait(60)
+    elapsed = time.perf_counter() - started
+    bot.quit()
+    peer.quit()
+    return {"unit": "round trips/s", "results": {"hc.sync": rate(replies[0], elapsed)}}
+
+
+def bench_memory(bots: int, server: LocalServer) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    frame = json.dumps({"cmd": "onlineSet", "users": [{"nick": f"user{i}", "trip": "t", "hash": "h", "utype": "user", "level": 100, "userid": i} for i in range(10000)]})
+    message = HCMsg(frame)
+    baseline = tracemalloc.take_snapshot()
+    users = message.users
+    after = tracemalloc.take_snapshot()
+    results["hc.users_10k.bytes_per_user"] = round(
+        sum(s.size_diff for s in after.compare_to(baseline, "filename")) / len(users), 1  # type: ignore
+    )
+    del users, message, frame, before, baseline, after
+    tracemalloc.stop()
+
+    gc.collect()
+    threads_before = threading.active_count()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    hub = Hub()
+    for i in range(bots):
+        hub.chatter(AsyncHCConnector(server.url), f"bench-mem{i % 10}", f"bot{i}")
+    hub.start()
+    deadline = time.monotonic() + 30
+    while sum(s["running"] for s in hub.status()) < bots and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.5)
+    after = tracemalloc.take_snapshot()
+    results["hub.bytes_per_bot"] = round(
+        sum(s.size_diff for s in after.compare_to(baseline, "filename")) / bots, 1
+    )
+    results["hub.threads_added"] = threading.active_count() - threads_before
+    hub.stop()
+    tracemalloc.stop()
+    return {"unit": "bytes", "results": results}
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="dotbotx offline benchmarks")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--trace", help="hack.chat archive to replay (default: a synthetic one)")
+    parser.add_argument(
+        "--baseline",
+        help="git revision to compare HCMsg parsing against (default: the latest tag)",
+    )
+    args = parser.parse_args(argv)
+
+    n = 2000 if args.quick else 20000
+    report: Dict[str, Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.time(),
+        "benchmarks": {},
+    }
+    benchmarks = report["benchmarks"]
+    benchmarks["parse"] = bench_parse(n)
+    benchmarks["trace"] = bench_trace(n, args.trace, args.baseline)
+    benchmarks["dispatch"] = bench_dispatch(n)
+    benchmarks["frames"] = bench_frames(n)
+    benchmarks["recv"] = bench_recv(n)
+    with LocalServer(hc_responder) as server:
+        benchmarks["send"] = bench_send(n // 4, server)
+        benchmarks["roundtrip"] = bench_roundtrip(n // 20, server)
+        benchmarks["memory"] = bench_memory(50 if args.quick else 200, server)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
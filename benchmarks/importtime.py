@@ -0,0 +1,118 @@
+# Import-time benchmark with a budget check.
+#
+#     python benchmarks/importtime.py [--runs 5] [--check] [--output results.json]
+#
+# Every target is imported in a fresh interpreter under `python -X importtime`;
+# the best cumulative time of the runs, minus interpreter startup imports, is
+# reported. With --check the script
+# exits non-zero when a target exceeds its budget, or when `import dotbotx`
+# loads any subpackage or websocket-client eagerly. tests/test_importtime.py
+# runs the same check under pytest.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets in milliseconds: generous enough for slow CI machines, tight enough
+# to catch an eager import of websocket-client or asyncio.
+TARGETS: Dict[str, Tuple[str, float]] = {
+    "package": ("import dotbotx", 60.0),
+    "hc_parse": ("from dotbotx.hc import HCMsg", 150.0),
+    "xchatter": ("from dotbotx import XChatter", 400.0),
+}
+
+
+def measure(statement: str) -> Tuple[float, List[str]]:
+    # Returns the cumulative import time of the top-level modules (ms) and the
+    # dotbotx/websocket modules that were loaded.
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    probe = (
+        f"{statement}\n"
+        "import sys\n"
+        "print('\\n'.join(m for m in sys.modules if m.startswith(('dotbotx', 'websocket'))))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only top-level entries are summed.
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1000, result.stdout.split()
+
+
+def run(runs: int) -> Tuple[float, Dict[str, Any], List[str]]:
+    # Returns the interpreter baseline (ms), per-target results and budget failures.
+    baseline = min(measure("pass")[0] for _ in range(runs))
+    results: Dict[str, Any] = {}
+    failures: List[str] = []
+    for name, (statement, budget) in TARGETS.items():
+        best: Optional[float] = None
+        modules: List[str] = []
+        for _ in range(runs):
+            elapsed, modules = measure(statement)
+            elapsed -= baseline
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {
+            "statement": statement,
+            "ms": round(best, 2),  # type: ignore
+            "budget_ms": budget,
+            "modules": len(modules),
+        }
+        if best > budget:  # type: ignore
+            failures.append(f"{name}: {best:.1f} ms > {budget} ms")
+        if name == "package" and modules != ["dotbotx"]:
+            failures.append(f"package: `import dotbotx` loaded {sorted(set(modules) - {'dotbotx'})}")
+        if name == "hc_parse" and any(m.startswith("websocket") for m in modules):
+            failures.append("hc_parse: parsing messages imported websocket-client")
+    return baseline, results, failures
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="dotbotx import-time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="fail when over budget")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    baseline, results, failures = run(args.runs)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.time(),
+        "baseline_ms": round(baseline, 2),
+        "benchmarks": {"importtime": {"unit": "ms", "results": results}},
+        "failures": failures,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.check and failures:
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
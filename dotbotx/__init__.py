@@ -1,9 +1,75 @@
-from .core import Chatter, Context, MessageCallback
-from . import abstract
-from . import hc
-from . import idns
-from .xcore import XChatter
-from . import xlogging
-from . import recv
-from . import module
-from . import helpers
\ No newline at end of file
+# Subpackages are imported on first attribute access, so `import dotbotx` stays
+# cheap for tools that only parse messages.
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+_SUBPACKAGES = frozenset(
+    {
+        "abstract",
+        "aio",
+        "archive",
+        "bridge",
+        "codec",
+        "core",
+        "dispatch",
+        "hc",
+        "helpers",
+        "hub",
+        "idns",
+        "keepalive",
+        "metrics",
+        "module",
+        "outbound",
+        "reconnect",
+        "recv",
+        "roster",
+        "router",
+        "session",
+        "shard",
+        "testing",
+        "xcore",
+        "xlogging",
+    }
+)
+# Need the "async" extra (websockets); importable, but kept out of `import *`.
+_ASYNC_SUBPACKAGES = frozenset({"aio", "hub", "shard", "testing"})
+_ATTRIBUTES = {
+    "Chatter": "core",
+    "Context": "core",
+    "EventMsg": "core",
+    "MessageCallback": "core",
+    "XChatter": "xcore",
+}
+
+__all__ = sorted((_SUBPACKAGES - _ASYNC_SUBPACKAGES) | _ATTRIBUTES.keys())
+
+if TYPE_CHECKING:
+    from . import abstract, archive, bridge, codec, core, dispatch, hc, helpers
+    from . import idns, keepalive, metrics, module, outbound, reconnect, recv
+    from . import roster, router, session, xcore, xlogging
+    from .core import Chatter, Context, EventMsg, MessageCallback
+    from .xcore import XChatter
+
+
+def __getattr__(name: str) -> Any:
+    if name in _ASYNC_SUBPACKAGES:
+        try:
+            value = importlib.import_module(f".{name}", __name__)
+        except ImportError as e:
+            raise ImportError(
+                f"dotbotx.{name} requires the async extra: pip install 'dotbotx[async]'"
+            ) from e
+    elif name in _SUBPACKAGES:
+        value = importlib.import_module(f".{name}", __name__)
+    elif name in _ATTRIBUTES:
+        value = getattr(importlib.import_module(f".{_ATTRIBUTES[name]}", __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(_SUBPACKAGES | _ATTRIBUTES.keys())
@@ -1 +1 @@
-from .__module import AbstractConnector, AbstractMsg, AbstractUserInfo
\ No newline at end of file
+from .__module import AbstractCodec, AbstractConnector, AbstractMsg, AbstractUserInfo
\ No newline at end of file
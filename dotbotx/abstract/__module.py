@@ -1,12 +1,24 @@
 from __future__ import annotations
 
 import abc
-from typing import Callable, List, Optional
+from typing import Any, Callable, List, Optional, Union
 
-import websocket
+
+class AbstractCodec(abc.ABC):
+    name: str
+
+    @abc.abstractmethod
+    def loads(self, data: Union[str, bytes]) -> Any:
+        ...
+
+    @abc.abstractmethod
+    def dumps(self, obj: Any) -> str:
+        ...
 
 
 class AbstractUserInfo(abc.ABC):
+    __slots__ = ()
+
     @abc.abstractmethod
     def __init__(self, *dicts):
         self.nick: Optional[str]
@@ -20,7 +32,7 @@ class AbstractUserInfo(abc.ABC):
 class AbstractMsg(abc.ABC):
     @abc.abstractmethod
     def __init__(self, message) -> None:
-        self.raw_data: str
+        self.raw_data: Union[str, bytes]
         self.data: dict
         self.extras: dict
         self.type: str
@@ -39,7 +51,9 @@ class AbstractConnector(abc.ABC):
         self.url: str
         self.site: str
         self.is_running: bool
+        self.codec: AbstractCodec
         self.send_hooks: List[Callable[[str], None]]
+        self.recv_hooks: List[Callable[[Union[str, bytes]], None]]
 
     def set_chatter(self, chatter):
         ...
@@ -81,5 +95,5 @@ class AbstractConnector(abc.ABC):
         ...
 
     @abc.abstractmethod
-    def parse_message(self, message: str) -> AbstractMsg:
+    def parse_message(self, message: Union[str, bytes]) -> AbstractMsg:
         ...
@@ -0,0 +1 @@
+from .__module import AsyncChatter, AsyncHCConnector, AsyncIDNSConnector
\ No newline at end of file
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import logging
+from typing import Any, Optional, Union
+import warnings
+
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import WebSocketException
+
+from ..abstract import AbstractCodec
+from ..codec import get_codec
+from ..core import Chatter, Context
+from ..hc import HCConnector
+from ..idns import IDNSConnector
+from ..keepalive import Keepalive
+from ..metrics import ConnectorMetrics
+from ..outbound import Outbound
+from ..reconnect import Backoff
+from ..xcore import XChatter
+
+logger = logging.getLogger("dotbotx.aio")
+
+
+class _AsyncWSConnector(abc.ABC):
+    # Shared machinery for connectors that receive, parse, dispatch and send on
+    # one event loop. Site specifics come from the sync connector it is mixed into.
+    url: str
+    chatter: Chatter
+    outbound: Optional[Outbound]
+    keepalive: Optional[Keepalive]
+
+    def _setup(self, reconnect: Optional[Backoff]):
+        self.send_hooks = []
+        self.recv_hooks = []
+        self.metrics: Optional[ConnectorMetrics] = None
+        self.ws: Optional[ClientConnection] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.reconnect = reconnect
+        self.reconnects = 0
+        self._outbox: Optional[asyncio.Queue[str]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._resuming = False
+        self._attempt = 0
+        self._wake: Optional[asyncio.Event] = None
+
+    def set_chatter(self, chatter: Chatter):
+        self.chatter = chatter
+
+    @property
+    def message_callback(self):
+        return self._on_frame
+
+    @property
+    def is_running(self):
+        return self.ws is not None
+
+    def _connect_kwargs(self) -> dict:
+        return {}
+
+    async def connect(self, channel: str, nick: str, password: Optional[str] = None):
+        if self.ws is not None:
+            raise RuntimeError("Already running")
+
+        self.loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._attempt = 0
+        if self.outbound is not None:
+            self.outbound.loop = self.loop
+        if self.keepalive is not None:
+            self.keepalive.wheel = self.loop
+
+        # _closing is not reset on entry: a quit() issued before this coroutine
+        # got to run must still win. It is cleared on the way out instead.
+        try:
+            await self.__reconnect_loop(channel, nick, password)
+        finally:
+            self._closing = False
+            self._wake = None
+
+    async def __reconnect_loop(self, channel: str, nick: str, password: Optional[str]):
+        while not self._closing:
+            try:
+                await self.__session(channel, nick, password)
+            except (OSError, WebSocketException):
+                if self.reconnect is None and not self._closing:
+                    raise
+            if self._closing:
+                return
+
+            self.chatter.emit("disconnected")
+            delay = self.reconnect.delay(self._attempt) if self.reconnect else None
+            if delay is None:
+                return
+            self._attempt += 1
+            self.reconnects += 1
+            self._resuming = True
+            self._on_reconnect()
+            self.chatter.emit("reconnecting", attempt=self._attempt, delay=delay)
+            # quit() sets the event, cutting the backoff short.
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)  # type: ignore
+            except asyncio.TimeoutError:
+                pass
+
+    async def __session(self, channel: str, nick: str, password: Optional[str]):
+        async with connect(self.url, **self._connect_kwargs()) as ws:
+            # quit() may have been called while the handshake was in flight.
+            if self._closing:
+                return
+            self.ws = ws
+            self._outbox = asyncio.Queue()
+            writer = self.loop.create_task(self.__write(ws, self._outbox))  # type: ignore
+            try:
+                self._on_open(channel, nick, password)
+                if self.keepalive is not None:
+                    self.keepalive.start()
+                if self._resuming:
+                    self._resuming = False
+                    self._attempt = 0
+                    self.chatter.emit("resumed", reconnects=self.reconnects)
+                async for data in ws:
+                    # Like websocket-client's on_message, a failing frame must
+                    # not end the session.
+                    try:
+                        self._on_frame(data)
+                    except Exception:
+                        logger.exception("Error while handling frame")
+            finally:
+                self.ws = None
+                writer.cancel()
+                if self.keepalive is not None:
+                    self.keepalive.stop()
+                self._on_close()
+
+    async def __write(self, ws: ClientConnection, outbox: asyncio.Queue[str]):
+        while True:
+            await ws.send(await outbox.get())
+
+    @abc.abstractmethod
+    def _on_open(self, channel: str, nick: str, password: Optional[str]):
+        ...
+
+    def _on_close(self):
+        ...
+
+    def _on_reconnect(self):
+        ...
+
+    def _on_frame(self, data: Union[str, bytes]):
+        for func in self.recv_hooks:
+            func(data)
+        if not self.wants(data):  # type: ignore
+            if self.metrics is not None:
+                self.metrics.skip()
+            return
+        if self.metrics is None:
+            message = self.parse_message(data)  # type: ignore
+        else:
+            message = self.metrics.parse(self.parse_message, data)  # type: ignore
+        if self.chatter.message_callback:
+            self.chatter.message_callback(Context(self.chatter, message))
+
+    def start(self, channel: str, nick: str, password: Optional[str] = None):
+        loop = self.loop or asyncio.get_event_loop()
+        self._task = loop.create_task(self.connect(channel, nick, password))
+
+    def wait(self):
+        if self._task is None:
+            raise RuntimeError("Connection is not started yet. Use start() first.")
+        self._task.get_loop().run_until_complete(self._task)
+
+    def run_forever(self, channel: str, nick: str, password: Optional[str] = None):
+        asyncio.run(self.connect(channel, nick, password))
+
+    def quit(self, timeout: Optional[float] = 5):
+        self._closing = True
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        if self._wake is not None:
+            if self.__in_loop():
+                self._wake.set()
+            else:
+                loop.call_soon_threadsafe(self._wake.set)
+        if self.ws is not None:
+            asyncio.run_coroutine_threadsafe(self.__close(timeout), self.loop)  # type: ignore
+
+    async def __close(self, timeout: Optional[float]):
+        if self.outbound is not None:
+            await self.outbound.drain(timeout)
+        if self.ws is not None:
+            await self.ws.close()
+
+    def send_string(self, message: str):
+        if self.ws is None or self._outbox is None:
+            raise RuntimeError("WebSocket is not connected.")
+        for func in self.send_hooks:
+            func(message)
+        if self.metrics is not None:
+            self.metrics.sent.inc()
+        if self.__in_loop():
+            self._outbox.put_nowait(message)
+        else:
+            self.loop.call_soon_threadsafe(self._outbox.put_nowait, message)  # type: ignore
+
+    def __in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+
+class AsyncHCConnector(_AsyncWSConnector, HCConnector):
+    def __init__(
+        self,
+        url: str = "wss://hack.chat/chat-ws",
+        site: str = "HC",
+        codec: Union[None, str, AbstractCodec] = None,
+        outbound: Optional[Outbound] = None,
+        reconnect: Optional[Backoff] = None,
+        ping_interval: Optional[float] = None,
+    ):
+        self.url = url
+        self.site = site
+        self.codec = get_codec(codec)
+        self.set_outbound(outbound)
+        self.keepalive = None
+        if ping_interval is not None:
+            self.keepalive = Keepalive(self.__ping, ping_interval)
+        self._setup(reconnect)
+
+    def _on_open(self, channel: str, nick: str, password: Optional[str]):
+        self.join(channel, nick, password)
+
+    def __ping(self):
+        if self.ws is None:
+            raise RuntimeError("WebSocket is not connected.")
+        self.loop.create_task(self.__wait_pong(self.ws))  # type: ignore
+
+    async def __wait_pong(self, ws: ClientConnection):
+        try:
+            await (await ws.ping())
+        except WebSocketException:
+            return
+        self.keepalive.pong()  # type: ignore
+
+
+class AsyncIDNSConnector(_AsyncWSConnector, IDNSConnector):
+    def __init__(
+        self,
+        country: str,
+        user_agent: str,
+        url: str = "ws://ws.idnsportal.com:444/",
+        site: str = "IDNS",
+        codec: Union[None, str, AbstractCodec] = None,
+        outbound: Optional[Outbound] = None,
+        reconnect: Optional[Backoff] = None,
+        ping_interval: float = 30,
+    ):
+        self.url = url
+        self.site = site
+        self.country = country
+        self.user_agent = user_agent
+        self.codec = get_codec(codec)
+        self.set_outbound(outbound)
+        self.keepalive = Keepalive(self.__ping, ping_interval)
+        self.init_finished = False
+        self._last_message_id = -1
+        self._setup(reconnect)
+
+    def _connect_kwargs(self) -> dict:
+        return {"user_agent_header": self.user_agent}
+
+    def _on_open(self, channel: str, nick: str, password: Optional[str]):
+        if password:
+            warnings.warn(
+                "IDNS Connectors doesn't support passwords! Passwords will be ignored."
+            )
+
+        self.channel = channel
+        self.nick = nick
+        self.join(channel, nick)
+
+    def __ping(self):
+        self._send_now({"type": "ping", "group": self.channel})
+
+    def _on_reconnect(self):
+        # History after lastMessageId is replayed on init, flagged as history.
+        self.init_finished = False
+
+    def _on_frame(self, data: Union[str, bytes]):
+        message = self._handle_frame(data)
+        if message is not None and self.chatter.message_callback:
+            self.chatter.message_callback(Context(self.chatter, message))
+
+
+class AsyncChatter(XChatter):
+    # Last config handed over by Supervisor.reload().
+    config: Any = None
+
+    def start(self):
+        self.loop = self.connector.loop or asyncio.get_event_loop()  # type: ignore
+        self.connector.loop = self.loop  # type: ignore
+        self.connector.start(self.channel, self.nick, self.password)
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        await self.connector.connect(self.channel, self.nick, self.password)  # type: ignore
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    def reload_config(self, config: Any):
+        # Called on the loop by Supervisor.reload(); override to apply the config.
+        self.config = config
+
+    def _submit(self, coro):
+        # Frames are dispatched on the loop itself; only pool workers need the
+        # thread-safe hop.
+        try:
+            in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            return self.loop.create_task(coro)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
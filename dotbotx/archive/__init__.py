@@ -0,0 +1,9 @@
+from .__module import (
+    RECV,
+    SEND,
+    ArchiveReader,
+    ArchiveWriter,
+    Frame,
+    ReplayConnector,
+    apply_recorder,
+)
\ No newline at end of file
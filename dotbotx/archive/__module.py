@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Iterator, List, NamedTuple, Optional, Union
+
+from ..abstract import AbstractCodec, AbstractConnector, AbstractMsg
+from ..codec import get_codec
+from ..core import Chatter, Context
+from ..hc import HCMsg, peek_hc_types
+from ..idns import IDNSMsg, idns_frame_needed
+from ..metrics import ConnectorMetrics
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("dotbotx.archive")
+
+RECV = 0
+SEND = 1
+
+MAGIC = b"DBXARC1\n"
+# timestamp, direction, compression, payload length
+RECORD = struct.Struct("<dBBI")
+
+_COMPRESSIONS = {None: 0, "gzip": 1, "zstd": 2}
+
+
+class Frame(NamedTuple):
+    time: float
+    direction: int
+    data: str
+
+
+class ArchiveWriter:
+    def __init__(
+        self, path: str, compression: Optional[str] = None, level: int = 3
+    ):
+        if compression not in _COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression!r}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package.")
+
+        self.path = path
+        self.compression = compression
+        self.level = level
+        self._flag = _COMPRESSIONS[compression]
+        self._compressor = (
+            zstandard.ZstdCompressor(level=level) if compression == "zstd" else None  # type: ignore
+        )
+        self._lock = threading.Lock()
+
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if new:
+            self._file.write(MAGIC)
+
+    def write(self, data: Union[str, bytes], direction: int = RECV):
+        payload = data.encode() if isinstance(data, str) else data
+        if self.compression == "gzip":
+            payload = gzip.compress(payload, self.level, mtime=0)
+        elif self._compressor is not None:
+            payload = self._compressor.compress(payload)
+
+        header = RECORD.pack(time.time(), direction, self._flag, len(payload))
+        with self._lock:
+            self._file.write(header)
+            self._file.write(payload)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ArchiveReader:
+    # Memory-maps the archive, so only the pages being replayed are resident.
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a dotbotx archive.")
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def __iter__(self) -> Iterator[Frame]:
+        data = self._map
+        offset = len(MAGIC)
+        end = len(data)
+        while offset + RECORD.size <= end:
+            timestamp, direction, flag, length = RECORD.unpack_from(data, offset)
+            if offset + RECORD.size + length > end:
+                break
+            offset += RECORD.size
+            payload = data[offset : offset + length]
+            offset += length
+            yield Frame(timestamp, direction, self.__decode(flag, payload))
+        if offset < end:
+            # The recorder died mid-write; everything before the torn record is fine.
+            logger.warning(
+                "%s: ignoring incomplete record at byte %d (%d bytes)",
+                self.path,
+                offset,
+                end - offset,
+            )
+
+    def frames(self, direction: Optional[int] = RECV) -> Iterator[Frame]:
+        for frame in self:
+            if direction is None or frame.direction == direction:
+                yield frame
+
+    def __decode(self, flag: int, payload: bytes) -> str:
+        if flag == 0:
+            return payload.decode()
+        elif flag == 1:
+            return gzip.decompress(payload).decode()
+        elif self._decompressor is not None:
+            return self._decompressor.decompress(payload).decode()
+        raise ImportError("This archive needs the zstandard package.")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def apply_recorder(
+    chatter: Chatter, path: str, compression: Optional[str] = None
+) -> ArchiveWriter:
+    writer = ArchiveWriter(path, compression)
+    chatter.connector.recv_hooks.append(lambda data: writer.write(data, RECV))
+    chatter.connector.send_hooks.append(lambda data: writer.write(data, SEND))
+    return writer
+
+
+class ReplayConnector(AbstractConnector):
+    def __init__(
+        self,
+        path: str,
+        site: str = "HC",
+        speed: Optional[float] = None,
+        codec: Union[None, str, AbstractCodec] = None,
+    ):
+        # speed=None replays as fast as possible; 1.0 keeps the recorded pace.
+        if site not in ("HC", "IDNS"):
+            raise ValueError(f"Unknown site: {site!r}")
+        self.url = path
+        self.path = path
+        self.site = site
+        self.speed = speed
+        self.codec = get_codec(codec)
+        self.send_hooks: List[Callable[[str], None]] = []
+        self.recv_hooks: List[Callable[[Union[str, bytes]], None]] = []
+        self.metrics: Optional[ConnectorMetrics] = None
+        self.sent = 0
+        self.replayed = 0
+        self.init_finished = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def set_chatter(self, chatter: Chatter):
+        self.chatter: Chatter = chatter
+
+    @property
+    def is_running(self):
+        return self._running
+
+    def start(self, channel: str, nick: str, password: Optional[str] = None):
+        self._thread = threading.Thread(
+            target=self.run_forever, args=(channel, nick, password), daemon=True
+        )
+        self._thread.start()
+
+    def wait(self):
+        if self._thread is None:
+            raise RuntimeError("Connection is not started yet. Use start() first.")
+        self._thread.join()
+
+    def run_forever(self, channel: str, nick: str, password: Optional[str] = None):
+        self._running = True
+        try:
+            with ArchiveReader(self.path) as reader:
+                first: Optional[float] = None
+                started = time.monotonic()
+                for frame in reader.frames(RECV):
+                    if not self._running:
+                        break
+                    if self.speed:
+                        if first is None:
+                            first = frame.time
+                        delay = (frame.time - first) / self.speed - (
+                            time.monotonic() - started
+                        )
+                        if delay > 0:
+                            time.sleep(delay)
+                    self.feed(frame.data)
+        finally:
+            self._running = False
+
+    def feed(self, data: Union[str, bytes]):
+        for func in self.recv_hooks:
+            func(data)
+        self.replayed += 1
+        if not self.wants(data):
+            if self.metrics is not None:
+                self.metrics.skip()
+            return
+        if self.metrics is None:
+            message = self.parse_message(data)
+        else:
+            message = self.metrics.parse(self.parse_message, data)
+        if self.chatter.wanted_types is not None and message.type not in self.chatter.wanted_types:
+            return
+        if self.chatter.message_callback:
+            self.chatter.message_callback(Context(self.chatter, message))
+
+    def quit(self):
+        self._running = False
+
+    def send_chat(self, text: str):
+        self.send_dict({"cmd": "chat", "text": text})
+
+    def send_whisper(self, text: str, nick: str):
+        self.send_dict({"cmd": "whisper", "nick": nick, "text": text})
+
+    def send_emote(self, text: str):
+        self.send_dict({"cmd": "emote", "text": text})
+
+    def send_dict(self, message: dict):
+        self.send_string(self.codec.dumps(message))
+
+    def send_string(self, message: str):
+        for func in self.send_hooks:
+            func(message)
+        if self.metrics is not None:
+            self.metrics.sent.inc()
+        self.sent += 1
+
+    def wants(self, data: Union[str, bytes]) -> bool:
+        wanted = self.chatter.wanted_types
+        if wanted is None:
+            return True
+        if self.site == "HC":
+            types = peek_hc_types(data)
+            return types is None or not types.isdisjoint(wanted)
+        return idns_frame_needed(data, wanted)
+
+    def parse_message(self, message: Union[str, bytes]) -> AbstractMsg:
+        if self.site == "HC":
+            return HCMsg(message, self.codec)
+        msg = IDNSMsg(message, not self.init_finished, self.codec)
+        if msg.type == "initFinished" and msg.data.get("data") == True:
+            self.init_finished = True
+            msg.is_history = False
+        return msg
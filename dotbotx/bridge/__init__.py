@@ -0,0 +1 @@
+from .__module import Bridge
\ No newline at end of file
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+import logging
+import threading
+import time
+from typing import Deque, Dict, Iterable, List, Optional
+
+from ..core import Chatter, Context
+from ..dispatch import PoolDispatcher
+from ..keepalive import Timer, TimerWheel, default_wheel
+from ..module import Module
+from ..outbound import TokenBucket
+
+logger = logging.getLogger("dotbotx.bridge")
+
+
+class _Target:
+    def __init__(self, bridge: "Bridge", chatter: Chatter):
+        self.bridge = bridge
+        self.chatter = chatter
+        self.lines: Deque[str] = deque(maxlen=bridge.max_queue)
+        self.bucket = TokenBucket(bridge.rate, bridge.burst)
+        self.timer: Optional[Timer] = None
+        self.sent = 0
+        self.dropped = 0
+
+    def put(self, line: str):
+        # Called with the bridge lock held.
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped += 1
+        self.lines.append(line)
+        if self.timer is None:
+            self.timer = self.bridge.wheel.call_later(self.bridge.batch_interval, self.flush)
+
+    def flush(self):
+        bridge = self.bridge
+        with bridge.lock:
+            self.timer = None
+            if not self.lines:
+                return
+            delay = self.bucket.delay(time.monotonic())
+            if delay > 0:
+                self.timer = bridge.wheel.call_later(delay, self.flush)
+                return
+            self.bucket.take()
+            batch = [self.lines.popleft() for _ in range(min(bridge.max_batch, len(self.lines)))]
+            if self.lines:
+                self.timer = bridge.wheel.call_later(bridge.batch_interval, self.flush)
+        bridge.deliver(self, batch)
+
+    def send(self, batch: List[str]):
+        try:
+            self.chatter.chat("\n".join(batch))
+            self.sent += len(batch)
+        except Exception:
+            logger.exception("Failed to relay %d line(s) to %s", len(batch), self.chatter.channel)
+
+    def cancel(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+class Bridge(Module):
+    def __init__(
+        self,
+        message_types: Iterable[str] = ("chat", "message"),
+        template: str = "[{channel}] {nick}: {text}",
+        batch_interval: float = 0.5,
+        max_batch: int = 10,
+        max_queue: int = 100,
+        rate: float = 1.0,
+        burst: float = 3,
+        recent_size: int = 1024,
+        wheel: Optional[TimerWheel] = None,
+    ):
+        super().__init__()
+        self.template = template
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.rate = rate
+        self.burst = burst
+        self.recent_size = recent_size
+        self.wheel = wheel if wheel is not None else default_wheel()
+
+        self.lock = threading.Lock()
+        self.targets: Dict[Chatter, _Target] = {}
+        # Hashes of lines we relayed recently; seeing one come back is an echo.
+        self._recent: "OrderedDict[int, None]" = OrderedDict()
+        # Sends for chatters without an outbound queue, off the wheel thread.
+        self._sender: Optional[PoolDispatcher] = None
+
+        self.register_callback(self.relay, list(message_types))
+
+    def before_apply(self, chatter: Chatter):
+        self.link(chatter)
+
+    def teardown(self, chatter: Chatter):
+        self.unlink(chatter)
+
+    def link(self, chatter: Chatter):
+        with self.lock:
+            if chatter not in self.targets:
+                self.targets[chatter] = _Target(self, chatter)
+
+    def unlink(self, chatter: Chatter):
+        with self.lock:
+            target = self.targets.pop(chatter, None)
+        if target is not None:
+            target.cancel()
+
+    def deliver(self, target: _Target, batch: List[str]):
+        # Runs on the timer wheel, which must not block on a slow socket.
+        if getattr(target.chatter.connector, "outbound", None) is not None:
+            target.send(batch)  # only queues
+            return
+        with self.lock:
+            if self._sender is None:
+                self._sender = PoolDispatcher(
+                    workers=1, max_queue=self.max_queue, policy="drop_oldest"
+                )
+            sender = self._sender
+        sender.submit(lambda: target.send(batch))
+
+    def format(self, ctx: Context) -> str:
+        return self.template.format(
+            site=ctx.chatter.connector.site,
+            channel=ctx.chatter.channel,
+            nick=ctx.message.sender.nick,  # type: ignore
+            text=ctx.message.text,
+        )
+
+    def relay(self, ctx: Context):
+        message = ctx.message
+        # Backlog replayed on join (IDNS history) was already seen by everyone.
+        if message.is_feedback or getattr(message, "is_history", False):
+            return
+        sender = message.sender
+        text = message.text
+        if sender is None or not text or sender.nick == ctx.chatter.nick:
+            return
+
+        line = self.format(ctx)
+        with self.lock:
+            # Another bridge (or another bot of ours) may post our batches back.
+            if all(hash(part) in self._recent for part in text.split("\n")):
+                return
+            recent = self._recent
+            recent[hash(line)] = None
+            recent.move_to_end(hash(line))
+            while len(recent) > self.recent_size:
+                recent.popitem(last=False)
+            for chatter, target in self.targets.items():
+                if chatter is not ctx.chatter:
+                    target.put(line)
+
+    def stats(self) -> List[dict]:
+        with self.lock:
+            return [
+                {
+                    "channel": chatter.channel,
+                    "queued": len(target.lines),
+                    "sent": target.sent,
+                    "dropped": target.dropped,
+                }
+                for chatter, target in self.targets.items()
+            ]
+
+    def close(self):
+        with self.lock:
+            targets = list(self.targets.values())
+            sender, self._sender = self._sender, None
+        for target in targets:
+            target.cancel()
+        if sender is not None:
+            sender.close(wait=False)
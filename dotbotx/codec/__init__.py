@@ -0,0 +1,9 @@
+from .__module import (
+    JSONCodec,
+    MsgspecCodec,
+    OrjsonCodec,
+    UjsonCodec,
+    available_codecs,
+    default_codec,
+    get_codec,
+)
\ No newline at end of file
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Type, Union
+
+from ..abstract import AbstractCodec
+
+
+class JSONCodec(AbstractCodec):
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj)
+
+
+class OrjsonCodec(AbstractCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._loads = orjson.loads
+        self._dumps = orjson.dumps
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self._dumps(obj).decode()
+
+
+class MsgspecCodec(AbstractCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._decoder.decode(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self._encoder.encode(obj).decode()
+
+
+class UjsonCodec(AbstractCodec):
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._loads = ujson.loads
+        self._dumps = ujson.dumps
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self._dumps(obj)
+
+
+# Ordered by preference. The stdlib codec is always available and comes last.
+CODECS: Dict[str, Type[AbstractCodec]] = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "ujson": UjsonCodec,
+    "json": JSONCodec,
+}
+
+# Misses are cached as None so a missing optional package is only looked up once.
+_instances: Dict[str, Optional[AbstractCodec]] = {}
+_default: Optional[AbstractCodec] = None
+
+
+def _load(name: str) -> Optional[AbstractCodec]:
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    try:
+        instance: Optional[AbstractCodec] = CODECS[name]()
+    except ImportError:
+        instance = None
+    _instances[name] = instance
+    return instance
+
+
+def available_codecs() -> List[str]:
+    return [name for name in CODECS if _load(name) is not None]
+
+
+def get_codec(codec: Union[None, str, AbstractCodec] = None) -> AbstractCodec:
+    if isinstance(codec, AbstractCodec):
+        return codec
+
+    if codec is None:
+        return default_codec()
+
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec!r}. Choose from {list(CODECS)}.")
+
+    instance = _load(codec)
+    if instance is None:
+        raise ImportError(f"Codec {codec!r} is not installed.")
+    return instance
+
+
+def default_codec() -> AbstractCodec:
+    global _default
+    if _default is None:
+        _default = next(c for c in map(_load, CODECS) if c is not None)
+    return _default
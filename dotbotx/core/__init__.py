@@ -1 +1 @@
-from .__module import Chatter, Context, MessageCallback
\ No newline at end of file
+from .__module import Chatter, Context, EventMsg, MessageCallback
\ No newline at end of file
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Coroutine, Optional, Union
+import re
+import time
+from typing import Any, Callable, Coroutine, FrozenSet, List, Optional, Union
 
 from ..abstract import AbstractUserInfo, AbstractConnector, AbstractMsg
 
@@ -18,6 +20,8 @@ class Chatter:
         self.password = password
         self.channel = channel
         self.message_callback: Optional[MessageCallback] = None
+        # Message types somebody listens to; None means every frame is wanted.
+        self.wanted_types: Optional[FrozenSet[str]] = None
 
         self.connector.set_chatter(self)
 
@@ -57,12 +61,38 @@ class Chatter:
     def me(self, text: str):
         self.connector.send_emote(text)
 
+    def emit(self, event_type: str, **extras):
+        # Lifecycle events (disconnected, reconnecting, resumed) are delivered
+        # like messages, so `on("disconnected")` works.
+        if self.message_callback:
+            self.message_callback(Context(self, EventMsg(event_type, **extras)))
+
+
+class EventMsg(AbstractMsg):
+    def __init__(self, type: str, **extras) -> None:
+        self.raw_data = ""
+        self.data: dict = {}
+        self.extras: dict = extras
+        self.type = type
+        self.is_feedback = False
+        self.raw_text = None
+        self.text = None
+        self.time = int(time.time() * 1000)
+        self.user_info = None
+        self.users = None
+        self.sender = None
+
 
 class Context:
     def __init__(self, chatter: Chatter, message: AbstractMsg):
         self.chatter = chatter
         self.message = message
 
+        # Filled in by dotbotx.router for the handlers it calls.
+        self.command: Optional[str] = None
+        self.args: Optional[List[str]] = None
+        self.match: Optional[re.Match] = None
+
     def reply(self, text: str):
         if self.message.type == "whisper":
             self.chatter.whisper(text, self.message.user_info.nick)  # type: ignore
@@ -0,0 +1 @@
+from .__module import ErrorHandler, InlineDispatcher, PoolDispatcher, guard_callback
\ No newline at end of file
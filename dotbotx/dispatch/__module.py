@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Callable, Deque, Dict, Hashable, List, Literal, Optional
+
+from ..core import Context, MessageCallback
+
+Job = Callable[[], None]
+Policy = Literal["block", "drop_oldest", "drop_newest"]
+ErrorHandler = Callable[[Context, BaseException], None]
+
+logger = logging.getLogger("dotbotx.dispatch")
+
+
+class InlineDispatcher:
+    ordered = False
+
+    def submit(self, job: Job, key: Optional[Hashable] = None):
+        job()
+
+    def close(self, wait: bool = True):
+        ...
+
+    def stats(self) -> Dict[str, float]:
+        return {}
+
+
+class _BoundedQueue:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.items: Deque[tuple[float, Job]] = deque()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.closed = False
+
+    def put(self, item: tuple[float, Job], policy: Policy) -> int:
+        # Returns the number of jobs dropped to make room.
+        with self.lock:
+            dropped = 0
+            if self.maxsize > 0 and len(self.items) >= self.maxsize:
+                if policy == "drop_newest":
+                    return 1
+                elif policy == "drop_oldest":
+                    self.items.popleft()
+                    dropped = 1
+                else:
+                    while len(self.items) >= self.maxsize and not self.closed:
+                        self.not_full.wait()
+            self.items.append(item)
+            self.not_empty.notify()
+            return dropped
+
+    def get(self) -> Optional[tuple[float, Job]]:
+        with self.lock:
+            while not self.items:
+                if self.closed:
+                    return None
+                self.not_empty.wait()
+            item = self.items.popleft()
+            self.not_full.notify()
+            return item
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+
+class PoolDispatcher(InlineDispatcher):
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 1024,
+        ordered: bool = False,
+        policy: Policy = "block",
+    ):
+        if policy not in ("block", "drop_oldest", "drop_newest"):
+            raise ValueError(f"Unknown backpressure policy: {policy!r}")
+
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ordered = ordered
+        self.policy: Policy = policy
+
+        # Ordered mode gives every worker its own queue so that jobs sharing a key
+        # always land on the same thread; otherwise all workers share one queue.
+        self._queues = [_BoundedQueue(max_queue) for _ in range(workers if ordered else 1)]
+
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._dropped = 0
+        self._failed = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._wait_total = 0.0
+
+        self._threads: List[threading.Thread] = []
+        for i in range(workers):
+            queue = self._queues[i % len(self._queues)]
+            thread = threading.Thread(target=self.__work, args=(queue,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job: Job, key: Optional[Hashable] = None):
+        if self.ordered:
+            queue = self._queues[hash(key) % len(self._queues)]
+        else:
+            queue = self._queues[0]
+
+        if queue.closed:
+            raise RuntimeError("Dispatcher is closed.")
+
+        dropped = queue.put((time.perf_counter(), job), self.policy)
+        with self._lock:
+            self._submitted += 1
+            self._dropped += dropped
+
+    def __work(self, queue: _BoundedQueue):
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+
+            queued_at, job = item
+            started = time.perf_counter()
+            try:
+                job()
+            except Exception:
+                logger.exception("Message callback raised")
+                failed = 1
+            else:
+                failed = 0
+            finished = time.perf_counter()
+
+            latency = finished - started
+            with self._lock:
+                self._completed += 1
+                self._failed += failed
+                self._wait_total += started - queued_at
+                self._latency_total += latency
+                if latency > self._latency_max:
+                    self._latency_max = latency
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue.items) for queue in self._queues)
+
+    def close(self, wait: bool = True):
+        for queue in self._queues:
+            queue.close()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "queue_max": self.max_queue,
+                "submitted": self._submitted,
+                "completed": completed,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "wait_avg": self._wait_total / completed if completed else 0.0,
+                "latency_avg": self._latency_total / completed if completed else 0.0,
+                "latency_max": self._latency_max,
+            }
+
+
+def _report(on_error: Optional[ErrorHandler], callback: MessageCallback, ctx: Context, exc: BaseException):
+    if on_error is None:
+        logger.error(
+            "Handler %s failed on %s message",
+            getattr(callback, "__qualname__", callback),
+            ctx.message.type,
+            exc_info=exc,
+        )
+        return
+    try:
+        on_error(ctx, exc)
+    except Exception:
+        logger.exception("on_error handler raised")
+
+
+def guard_callback(
+    callback: MessageCallback,
+    timeout: Optional[float] = None,
+    concurrency: Optional[int] = None,
+    coalesce: bool = False,
+    on_error: Optional[ErrorHandler] = None,
+) -> MessageCallback:
+    # Per-handler policies. timeout/concurrency/coalesce only make sense for
+    # coroutine handlers, which run on the chatter's loop.
+    if not asyncio.iscoroutinefunction(callback):
+        if timeout is not None or concurrency is not None or coalesce:
+            raise ValueError(
+                "timeout, concurrency and coalesce only apply to coroutine handlers."
+            )
+
+        @functools.wraps(callback)
+        def guarded_sync(ctx: Context):
+            try:
+                ret = callback(ctx)
+            except Exception as exc:
+                _report(on_error, callback, ctx, exc)
+                return None
+            if ret is not None and inspect.isawaitable(ret):
+                return _guarded_await(ret, callback, ctx, None, on_error)
+            return None
+
+        return guarded_sync
+
+    semaphore: Optional[asyncio.Semaphore] = None
+    # coalesce: while a call is running, newer messages replace each other and
+    # only the latest one is handled next.
+    latest: List[Context] = []
+    running = False
+
+    async def run(ctx: Context):
+        nonlocal semaphore
+        if concurrency is None:
+            await _guarded_await(callback(ctx), callback, ctx, timeout, on_error)
+            return
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(concurrency)
+        async with semaphore:
+            await _guarded_await(callback(ctx), callback, ctx, timeout, on_error)
+
+    @functools.wraps(callback)
+    async def guarded(ctx: Context):
+        nonlocal running
+        if not coalesce:
+            await run(ctx)
+            return
+        latest[:] = [ctx]
+        if running:
+            return
+        running = True
+        try:
+            while latest:
+                await run(latest.pop())
+        finally:
+            running = False
+
+    return guarded
+
+
+async def _guarded_await(
+    awaitable,
+    callback: MessageCallback,
+    ctx: Context,
+    timeout: Optional[float],
+    on_error: Optional[ErrorHandler],
+):
+    try:
+        if timeout is None:
+            await awaitable
+        else:
+            await asyncio.wait_for(awaitable, timeout)
+    except Exception as exc:
+        _report(on_error, callback, ctx, exc)
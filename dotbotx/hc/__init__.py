@@ -1 +1 @@
-from .__module import HCConnector, HCMsg, HCUserInfo
\ No newline at end of file
+from .__module import HCConnector, HCMsg, HCUserInfo, peek_hc_types
\ No newline at end of file
@@ -1,25 +1,57 @@
 from __future__ import annotations
 
-import json
 import re
 import threading
-from typing import Callable, Optional, Literal
+from typing import TYPE_CHECKING, Callable, FrozenSet, Optional, Literal, Union
 
-import websocket
-
-from ..abstract import AbstractConnector, AbstractMsg, AbstractUserInfo
+from ..abstract import AbstractCodec, AbstractConnector, AbstractMsg, AbstractUserInfo
+from ..codec import default_codec, get_codec
 from ..core import Chatter, Context
+from ..keepalive import Keepalive
+from ..metrics import ConnectorMetrics
+from ..outbound import PRIORITY_HIGH, PRIORITY_NORMAL, Outbound
+from ..reconnect import Backoff
 
+# websocket-client is only imported once a connector is created, so parsing
+# messages does not pay for it.
+if TYPE_CHECKING:
+    import websocket
 
-WSMessageCallback = Callable[[websocket.WebSocketApp, str], None]
+WSMessageCallback = Callable[["websocket.WebSocketApp", Union[str, bytes]], None]
 
 
 class HCConnector(AbstractConnector):
-    def __init__(self, url: str = "wss://hack.chat/chat-ws", site: str = "HC"):
+    def __init__(
+        self,
+        url: str = "wss://hack.chat/chat-ws",
+        site: str = "HC",
+        codec: Union[None, str, AbstractCodec] = None,
+        outbound: Optional[Outbound] = None,
+        reconnect: Optional[Backoff] = None,
+        ping_interval: Optional[float] = None,
+    ):
         self.url = url
         self.site = site
+        self.codec = get_codec(codec)
+        self.set_outbound(outbound)
+        self.reconnect = reconnect
+        self.reconnects = 0
+        self._closing = False
+        self._resuming = False
+        self._wake = threading.Event()
+        import websocket
+
         self.ws = websocket.WebSocketApp(self.url)
+
+        # hack.chat answers websocket-level pings, so keepalive is optional here.
+        self.keepalive: Optional[Keepalive] = None
+        if ping_interval is not None:
+            self.keepalive = Keepalive(self.__ping, ping_interval)
+            self.ws.on_pong = lambda ws, data: self.keepalive.pong()  # type: ignore
+            self.ws.on_close = lambda ws, code, reason: self.keepalive.stop()  # type: ignore
         self.send_hooks: list[Callable[[str], None]] = []
+        self.recv_hooks: list[Callable[[Union[str, bytes]], None]] = []
+        self.metrics: Optional[ConnectorMetrics] = None
 
         # def ws_on_open(ws: websocket.WebSocketApp):
         #     ...
@@ -39,8 +71,17 @@ class HCConnector(AbstractConnector):
     def set_chatter(self, chatter: Chatter):
         self.chatter: Chatter = chatter
 
-        def message_callback(ws: websocket.WebSocketApp, data: str):
-            message = self.parse_message(data)
+        def message_callback(ws: websocket.WebSocketApp, data: Union[str, bytes]):
+            for func in self.recv_hooks:
+                func(data)
+            if not self.wants(data):
+                if self.metrics is not None:
+                    self.metrics.skip()
+                return
+            if self.metrics is None:
+                message = self.parse_message(data)
+            else:
+                message = self.metrics.parse(self.parse_message, data)
             context = Context(self.chatter, message)
             if self.chatter.message_callback:
                 self.chatter.message_callback(context)
@@ -58,15 +99,21 @@ class HCConnector(AbstractConnector):
     def start(self, channel: str, nick: str, password: Optional[str] = None):
         self.__start(channel, nick, password)
 
-        self._thread = threading.Thread(target=self.run_forever, daemon=True)
+        self._thread = threading.Thread(target=self.__loop, daemon=True)
         self._thread.start()
 
     def __start(self, channel: str, nick: str, password: Optional[str]):
         if self.ws.keep_running:
             raise RuntimeError("Already running")
+        self._closing = False
+        self._wake.clear()
+        self._attempt = 0
 
         def ws_on_open(ws: websocket.WebSocketApp):
             self.join(channel, nick, password)
+            self.__opened()
+            if self.keepalive is not None:
+                self.keepalive.start()
 
         self.ws.on_open = ws_on_open
 
@@ -76,17 +123,67 @@ class HCConnector(AbstractConnector):
         except (AttributeError, RuntimeError):
             raise RuntimeError("Connection is not started yet. Use start() first.")
 
+    def __ping(self):
+        if not self.ws.keep_running or self.ws.sock is None:
+            raise RuntimeError("WebSocket is not connected.")
+        self.ws.sock.ping()
+
+    @property
+    def rtt(self) -> Optional[float]:
+        return self.keepalive.rtt if self.keepalive is not None else None
+
+    def __opened(self):
+        if self._resuming:
+            self._resuming = False
+            self._attempt = 0
+            self.__emit("resumed", reconnects=self.reconnects)
+
+    def __emit(self, event_type: str, **extras):
+        chatter = getattr(self, "chatter", None)
+        if chatter is not None:
+            chatter.emit(event_type, **extras)
+
     def run_forever(self, channel: str, nick: str, password: Optional[str] = None):
         self.__start(channel, nick, password)
-        self.ws.run_forever()
+        self.__loop()
+
+    def __loop(self):
+        while not self._closing:
+            # websocket-client only re-checks keep_running when its select times
+            # out (10 s by default), so this bounds how long quit() takes.
+            self.ws.run_forever(ping_timeout=1)
+            if self.keepalive is not None:
+                self.keepalive.stop()
+            if self._closing:
+                return
+
+            self.__emit("disconnected")
+            delay = self.reconnect.delay(self._attempt) if self.reconnect else None
+            if delay is None:
+                return
+            self._attempt += 1
+            self.reconnects += 1
+            self._resuming = True
+            self.__emit("reconnecting", attempt=self._attempt, delay=delay)
+            # quit() during the backoff wakes us up instead of reconnecting.
+            self._wake.wait(delay)
 
     def join(self, channel: str, nick: str, password: Optional[str] = None):
         payload = {"cmd": "join", "channel": channel, "nick": nick}
         if password:
             payload["pass"] = password
-        self.send_dict(payload)
-
-    def quit(self):
+        self._send_now(payload)
+
+    def set_outbound(self, outbound: Optional[Outbound]):
+        self.outbound = outbound
+        if outbound is not None:
+            outbound.send = self._send_now
+
+    def quit(self, timeout: Optional[float] = 5):
+        self._closing = True
+        self._wake.set()
+        if self.outbound is not None:
+            self.outbound.flush(timeout)
         self.ws.close()
 
     def send_chat(self, text: str):
@@ -101,21 +198,42 @@ class HCConnector(AbstractConnector):
         self.send_dict({"cmd": "emote", "text": text})
 
     def send_dict(self, message: dict):
-        self.send_string(json.dumps(message))
+        if self.outbound is None:
+            self._send_now(message)
+        elif message.get("cmd") == "chat":
+            self.outbound.put(message, PRIORITY_NORMAL, "chat")
+        elif message.get("cmd") == "emote":
+            self.outbound.put(message, PRIORITY_NORMAL)
+        else:
+            self.outbound.put(message, PRIORITY_HIGH)
+
+    def _send_now(self, message: dict):
+        self.send_string(self.codec.dumps(message))
 
     def send_string(self, message: str):
         if not self.ws.keep_running:
             raise RuntimeError("WebSocket is not connected.")
         for func in self.send_hooks:
             func(message)
+        if self.metrics is not None:
+            self.metrics.sent.inc()
         self.ws.send(message)
 
-    def parse_message(self, message: str) -> HCMsg:
-        return HCMsg(message)
+    def wants(self, data: Union[str, bytes]) -> bool:
+        wanted = self.chatter.wanted_types
+        if wanted is None:
+            return True
+        types = peek_hc_types(data)
+        return types is None or not types.isdisjoint(wanted)
 
+    def parse_message(self, message: Union[str, bytes]) -> HCMsg:
+        return HCMsg(message, self.codec)
 
-def parse_hc_message(message: str) -> HCMsg:
-    return HCMsg(message)
+
+def parse_hc_message(
+    message: Union[str, bytes], codec: Optional[AbstractCodec] = None
+) -> HCMsg:
+    return HCMsg(message, codec)
 
 
 MessageType = Literal[
@@ -134,32 +252,88 @@ MessageType = Literal[
     "unknown",
 ]
 
+_PLAIN_TYPES = frozenset(
+    {
+        "chat",
+        "emote",
+        "warn",
+        "onlineSet",
+        "onlineAdd",
+        "onlineRemove",
+        "captcha",
+        "updateUser",
+    }
+)
+_INFO_SUBTYPES = frozenset({"whisper", "invite", "emote"})
+_USER_INFO_TYPES = frozenset({"chat", "emote", "onlineAdd", "onlineRemove", "updateUser"})
+_FROM_INFO_TYPES = frozenset({"whisper", "invite"})
+_SENDER_TYPES = frozenset({"chat", "emote", "whisper", "invite"})
+_USER_FIELDS = ("nick", "trip", "color", "level", "utype", "hash")
+# Payload keys that belong to the message rather than its sender.
+_MESSAGE_KEYS = frozenset({"cmd", "text", "time", "type", "from", "to", "nicks", "users"})
+
+# Types a frame may turn into, by "cmd"; used to drop frames before decoding.
+_CMD_TYPES = {cmd: frozenset({cmd}) for cmd in _PLAIN_TYPES}
+_CMD_TYPES["info"] = _INFO_SUBTYPES | {"changeNick", "info"}
+_UNKNOWN_TYPES = frozenset({"unknown"})
+_CMD_RE = re.compile(r'"cmd"\s*:\s*"([^"\\]*)"')
+_CMD_RE_BYTES = re.compile(rb'"cmd"\s*:\s*"([^"\\]*)"')
+
+_CHANGE_NICK_RE = re.compile(r"^(.+?) is now (.+)$")
+_WHISPER_FEEDBACK_RE = re.compile(r"You whispered to @.+?: ")
+_INVITE_FEEDBACK_RE = re.compile(r"You invited .+? to \?")
+_WHISPER_TEXT_RE = re.compile(r"(?:You whispered to @.+?: |.+? whispered: )(.+)")
+_EMOTE_TEXT_RE = re.compile(r"(?:@.+? )(.+)")
+
+
+def peek_hc_types(data: Union[str, bytes]) -> Optional[FrozenSet[str]]:
+    if isinstance(data, str):
+        match_ = _CMD_RE.search(data)
+        cmd = match_ and match_.group(1)
+    else:
+        match_ = _CMD_RE_BYTES.search(data)
+        cmd = match_ and match_.group(1).decode()
+    if not match_:
+        return None
+    return _CMD_TYPES.get(cmd, _UNKNOWN_TYPES)  # type: ignore
+
+
+class _cached:
+    # functools.cached_property minus the lock it takes on every first access
+    # before Python 3.12, which costs more than most of these fields do.
+    def __init__(self, func: Callable):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.name] = self.func(obj)
+        return value
+
 
 class HCMsg(AbstractMsg):
-    def __init__(self, data: str) -> None:
+    def __init__(
+        self, data: Union[str, bytes], codec: Optional[AbstractCodec] = None
+    ) -> None:
         self.raw_data = data
-        self.data: dict = json.loads(data)
+        self.data: dict = (codec or default_codec()).loads(data)
         self.extras: dict = {}
         self.type: MessageType
 
         cmd: Optional[str] = self.data.get("cmd")
-        if cmd in [
-            "chat",
-            "emote",
-            "warn",
-            "onlineSet",
-            "onlineAdd",
-            "onlineRemove",
-            "captcha",
-            "updateUser",
-        ]:
+        if cmd in _PLAIN_TYPES:
             self.type = cmd  # type: ignore
         elif cmd == "info":
-            if self.data.get("type") in ["whisper", "invite", "emote"]:
+            raw_text = self.raw_text
+            if self.data.get("type") in _INFO_SUBTYPES:
                 # `"cmd": "info", "type": "emote"` seems to be a legacy format of message, which may be replaced by `"cmd": "emote"` in HC now.
                 self.type = self.data.get("type", "unknown")
-            elif self.raw_text and re.match(r"(.+?) is now (.+?)", self.raw_text):
-                match_: re.Match[str] = re.match(r"(.+?) is now (.+?)", self.raw_text)  # type: ignore
+            elif raw_text and (match_ := _CHANGE_NICK_RE.match(raw_text)):
                 self.type = "changeNick"
                 self.extras["oldNick"] = match_.group(1)
                 self.extras["newNick"] = match_.group(2)
@@ -168,18 +342,17 @@ class HCMsg(AbstractMsg):
         else:
             self.type = "unknown"
 
-    @property
+    @_cached
     def is_feedback(self) -> bool:
-        if not self.raw_text:
+        raw_text = self.raw_text
+        if not raw_text:
             return False
 
         if self.type == "whisper":
-            if re.match(r"You whispered to @.+?: ", self.raw_text):
-                return True
+            return _WHISPER_FEEDBACK_RE.match(raw_text) is not None
 
         elif self.type == "invite":
-            if re.match(r"You invited .+? to \?", self.raw_text):
-                return True
+            return _INVITE_FEEDBACK_RE.match(raw_text) is not None
 
         return False
 
@@ -187,51 +360,50 @@ class HCMsg(AbstractMsg):
     def raw_text(self) -> Optional[str]:
         return self.data.get("text")
 
-    @property
+    @_cached
     def text(self) -> Optional[str]:
-        if not self.raw_text:
+        raw_text = self.raw_text
+        if not raw_text:
             return None
 
         if self.type == "whisper":
-            #fmt: off
-            return re.match(
-                r"(?:You whispered to @.+?: |.+? whispered: )(.+)", self.raw_text
-            ).group(1)  # type: ignore
-            # fmt: on
+            return _WHISPER_TEXT_RE.match(raw_text).group(1)  # type: ignore
 
         elif self.type == "emote":
-            return re.match(r"(?:@.+? )(.+)", self.raw_text).group(1)  # type: ignore
+            return _EMOTE_TEXT_RE.match(raw_text).group(1)  # type: ignore
 
         else:
-            return self.raw_text
+            return raw_text
 
     @property
     def time(self) -> Optional[int]:
         return self.data.get("time")
 
-    @property
+    @_cached
     def user_info(self) -> Optional[HCUserInfo]:
-        if self.type in ["chat", "emote", "onlineAdd", "onlineRemove", "updateUser"]:
+        if self.type in _USER_INFO_TYPES:
             # chat has almost full, emote and updateUser has some, onlineAdd has full, onlineRemove only has nick.
-            return HCUserInfo(self.data)
+            return HCUserInfo(self.data, hidden=_MESSAGE_KEYS)
 
-        elif self.type in ["whisper", "invite"]:
+        elif self.type in _FROM_INFO_TYPES:
             # whisper has almost full user info, while invite only has nick. however, both feedbacks have no user info.
             if self.is_feedback:
                 return
 
-            return HCUserInfo(self.data, {"nick": self.data.get("from")})
+            return HCUserInfo(
+                self.data, {"nick": self.data.get("from")}, hidden=_MESSAGE_KEYS
+            )
 
-    @property
+    @_cached
     def users(self) -> Optional[tuple[HCUserInfo]]:
         if "users" not in self.data:
             raise KeyError('"users" not found in raw message.')
 
         return tuple(map(HCUserInfo, self.data["users"]))
 
-    @property
+    @_cached
     def sender(self) -> Optional[HCUserInfo]:
-        if self.type in ["chat", "emote", "whisper", "invite"]:
+        if self.type in _SENDER_TYPES:
             return self.user_info
 
 
@@ -242,31 +414,39 @@ class HCChatMsg(HCMsg):
 
 
 class HCUserInfo(AbstractUserInfo):
-    def __init__(self, *dicts):
-        self._data = {}
-        for dct in dicts:
-            self._data.update(dct)
-
-    @property
-    def nick(self) -> Optional[str]:
-        return self._data.get("nick")
-
-    @property
-    def trip(self) -> Optional[str]:
-        return self._data.get("trip")
-
-    @property
-    def color(self) -> Optional[str]:
-        return self._data.get("color")
-
-    @property
-    def level(self) -> Optional[str]:
-        return self._data.get("level")
-
-    @property
-    def utype(self) -> Optional[str]:
-        return self._data.get("utype")
-
-    @property
-    def hash(self) -> Optional[str]:
-        return self._data.get("hash")
+    __slots__ = ("nick", "trip", "color", "level", "utype", "hash", "_sources", "_hidden")
+
+    def __init__(self, *dicts, hidden: FrozenSet[str] = frozenset()):
+        # Known fields are read once; the payload dicts are kept, not copied, so
+        # any other field can still be looked up lazily. Later dicts win.
+        # `hidden` names keys to skip when a dict is a whole message payload
+        # rather than a user entry, so message fields such as "text" are not
+        # mistaken for user fields.
+        self._sources = dicts
+        self._hidden = hidden
+        if len(dicts) == 1:
+            get = dicts[0].get
+            self.nick: Optional[str] = get("nick")
+            self.trip: Optional[str] = get("trip")
+            self.color: Optional[str] = get("color")
+            self.level: Optional[str] = get("level")
+            self.utype: Optional[str] = get("utype")
+            self.hash: Optional[str] = get("hash")
+        else:
+            for field in _USER_FIELDS:
+                setattr(self, field, self.get(field))
+
+    def get(self, key: str, default=None):
+        if key in self._hidden:
+            return default
+        for dct in reversed(self._sources):
+            if key in dct:
+                return dct[key]
+        return default
+
+    def __getattr__(self, name: str):
+        if not name.startswith("_") and name not in self._hidden:
+            for dct in reversed(self._sources):
+                if name in dct:
+                    return dct[name]
+        raise AttributeError(name)
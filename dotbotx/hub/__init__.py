@@ -0,0 +1 @@
+from .__module import Hub
\ No newline at end of file
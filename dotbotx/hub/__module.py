@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Dict, List, Optional
+
+from ..abstract import AbstractConnector
+from ..aio import AsyncChatter
+from ..module import Module, reload_module
+
+
+class Hub:
+    def __init__(self, stop_timeout: float = 10):
+        self.stop_timeout = stop_timeout
+        self.chatters: List[AsyncChatter] = []
+        self.modules: List[Module] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Dict[AsyncChatter, asyncio.Task] = {}
+        self._errors: Dict[AsyncChatter, BaseException] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    def chatter(
+        self,
+        connector: AbstractConnector,
+        channel: str,
+        nick: str,
+        password: str = "",
+        **kwargs,
+    ) -> AsyncChatter:
+        return self.add(AsyncChatter(connector, channel, nick, password, **kwargs))
+
+    def add(self, chatter: AsyncChatter) -> AsyncChatter:
+        if not isinstance(chatter, AsyncChatter):
+            raise TypeError("Hub can only drive AsyncChatter instances.")
+        for module in self.modules:
+            chatter.apply(module)
+        self.chatters.append(chatter)
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.__launch, chatter)
+        return chatter
+
+    def remove(self, chatter: AsyncChatter):
+        self.chatters.remove(chatter)
+        chatter.quit()
+
+    def apply(self, module: Module):
+        self.modules.append(module)
+        for chatter in self.chatters:
+            chatter.apply(module)
+
+    def unapply(self, module: Module):
+        self.modules.remove(module)
+        for chatter in self.chatters:
+            chatter.unapply(module)
+
+    def reload(self, module: Module, **kwargs) -> Module:
+        new = reload_module(module, **kwargs)
+        self.modules[self.modules.index(module)] = new
+        for chatter in self.chatters:
+            chatter.replace(module, new)
+        return new
+
+    def __launch(self, chatter: AsyncChatter):
+        chatter.loop = self.loop  # type: ignore
+        task = self.loop.create_task(chatter.serve())  # type: ignore
+        self._tasks[chatter] = task
+        task.add_done_callback(lambda t: self.__finished(chatter, t))
+
+    def __finished(self, chatter: AsyncChatter, task: asyncio.Task):
+        if self._tasks.get(chatter) is task:
+            del self._tasks[chatter]
+        if not task.cancelled() and task.exception() is not None:
+            self._errors[chatter] = task.exception()  # type: ignore
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        await self.__serve()
+
+    async def __serve(self):
+        for chatter in self.chatters:
+            self.__launch(chatter)
+        await self._stopped.wait()
+
+        for chatter in self.chatters:
+            chatter.quit()
+        if self._tasks:
+            _, pending = await asyncio.wait(
+                list(self._tasks.values()), timeout=self.stop_timeout
+            )
+            # Connectors that ignore quit() (e.g. stuck in a handshake) are cancelled.
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    def start(self):
+        if self._thread is not None:
+            raise RuntimeError("Already running")
+        ready = threading.Event()
+
+        def run():
+            # loop and _stopped are in place before start() returns, so stop()
+            # and call_soon_threadsafe() work right away.
+            loop = self.loop = asyncio.new_event_loop()
+            self._stopped = asyncio.Event()
+            ready.set()
+            loop.run_until_complete(self.__serve())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def wait(self):
+        if self._thread is None:
+            raise RuntimeError("Hub is not started yet. Use start() first.")
+        self._thread.join()
+
+    def stop(self):
+        if self.loop is not None and self._stopped is not None:
+            self.loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "site": chatter.connector.site,
+                "channel": chatter.channel,
+                "nick": chatter.nick,
+                "running": chatter.is_running,
+                "error": repr(self._errors[chatter]) if chatter in self._errors else None,
+            }
+            for chatter in self.chatters
+        ]
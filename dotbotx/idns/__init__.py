@@ -1 +1 @@
-from .__module import IDNSConnector, IDNSMsg, IDNSUserInfo
\ No newline at end of file
+from .__module import IDNSConnector, IDNSMsg, IDNSUserInfo, idns_frame_needed, peek_idns_type
\ No newline at end of file
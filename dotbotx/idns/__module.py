@@ -1,18 +1,23 @@
 from __future__ import annotations
 
-import json
+import re
 import threading
 import time
-from typing import Callable, List, Optional, Literal, Union
+from typing import TYPE_CHECKING, Callable, FrozenSet, List, Optional, Literal, Union
 import warnings
 
-import websocket
-
-from ..abstract import AbstractConnector, AbstractMsg, AbstractUserInfo
+from ..abstract import AbstractCodec, AbstractConnector, AbstractMsg, AbstractUserInfo
+from ..codec import default_codec, get_codec
 from ..core import Chatter, Context
+from ..keepalive import Keepalive
+from ..metrics import ConnectorMetrics
+from ..outbound import PRIORITY_HIGH, PRIORITY_NORMAL, Outbound
+from ..reconnect import Backoff
 
+if TYPE_CHECKING:
+    import websocket
 
-WSMessageCallback = Callable[[websocket.WebSocketApp, str], None]
+WSMessageCallback = Callable[["websocket.WebSocketApp", Union[str, bytes]], None]
 
 
 class IDNSConnector(AbstractConnector):
@@ -22,18 +27,35 @@ class IDNSConnector(AbstractConnector):
         user_agent: str,
         url: str = "ws://ws.idnsportal.com:444/",
         site: str = "IDNS",
+        codec: Union[None, str, AbstractCodec] = None,
+        outbound: Optional[Outbound] = None,
+        reconnect: Optional[Backoff] = None,
+        ping_interval: float = 30,
     ):
         self.url = url
         self.site = site
+        self.codec = get_codec(codec)
+        self.set_outbound(outbound)
+        self.reconnect = reconnect
+        self.reconnects = 0
+        self._closing = False
+        self._resuming = False
+        self._wake = threading.Event()
+        self.keepalive = Keepalive(self.__ping, ping_interval)
         self.country = country
         self.user_agent = user_agent
+        import websocket
+
         self.ws = websocket.WebSocketApp(self.url, header={"User-Agent": user_agent})
         self.send_hooks: List[Callable[[str], None]] = []
+        self.recv_hooks: List[Callable[[Union[str, bytes]], None]] = []
+        self.metrics: Optional[ConnectorMetrics] = None
 
         self.init_finished = False
         self._last_message_id = -1
 
         self.ws.on_message = self.__basic_message_callback
+        self.ws.on_close = lambda ws, code, reason: self.keepalive.stop()
 
         # def ws_on_open(ws: websocket.WebSocketApp):
         #     ...
@@ -50,22 +72,49 @@ class IDNSConnector(AbstractConnector):
         # def ws_on_data(ws: websocket.WebSocketApp, data: str, data_type: int, continue_flag: int):
         #     ...
 
-    def __basic_message_callback(self, ws: websocket.WebSocketApp, data: str):
-        message = self.parse_message(data)
+    def __basic_message_callback(
+        self, ws: websocket.WebSocketApp, data: Union[str, bytes]
+    ):
+        self._handle_frame(data)
+
+    def _wanted_types(self) -> Optional[FrozenSet[str]]:
+        chatter = getattr(self, "chatter", None)
+        return None if chatter is None else chatter.wanted_types
+
+    def _handle_frame(self, data: Union[str, bytes]) -> Optional[IDNSMsg]:
+        # Returns None for frames nobody subscribed to.
+        for func in self.recv_hooks:
+            func(data)
+        wanted = self._wanted_types()
+        if wanted is not None and not idns_frame_needed(data, wanted):
+            if self.metrics is not None:
+                self.metrics.skip()
+            return None
+        if self.metrics is None:
+            message = self.parse_message(data)
+        else:
+            message = self.metrics.parse(self.parse_message, data)
 
         if message.type == "initFinished" and message.data.get("data") == True:
             self.init_finished = True
+            message.is_history = False
 
         if message.message:
             self._last_message_id = message.message.get("messageId")
+        elif message.type == "pong":
+            self.keepalive.pong()
+
+        if wanted is not None and message.type not in wanted:
+            return None
+        return message
 
     def set_chatter(self, chatter: Chatter):
         self.chatter: Chatter = chatter
 
-        def message_callback(ws: websocket.WebSocketApp, data: str):
-            self.__basic_message_callback(ws, data)
-
-            message = self.parse_message(data)
+        def message_callback(ws: websocket.WebSocketApp, data: Union[str, bytes]):
+            message = self._handle_frame(data)
+            if message is None:
+                return
 
             context = Context(self.chatter, message)
             if self.chatter.message_callback:
@@ -84,12 +133,15 @@ class IDNSConnector(AbstractConnector):
     def start(self, channel: str, nick: str, password: Optional[str] = None):
         self.__start(channel, nick, password)
 
-        self._thread = threading.Thread(target=self.run_forever, daemon=True)
+        self._thread = threading.Thread(target=self.__loop, daemon=True)
         self._thread.start()
 
     def __start(self, channel: str, nick: str, password: Optional[str]):
         if self.ws.keep_running:
             raise RuntimeError("Already running")
+        self._closing = False
+        self._wake.clear()
+        self._attempt = 0
 
         if password:
             warnings.warn(
@@ -99,15 +151,10 @@ class IDNSConnector(AbstractConnector):
         self.channel = channel
         self.nick = nick
 
-        def ping():
-            while True:
-                self.send_dict({"type": "ping", "group": self.channel})
-                time.sleep(30)
-
         def ws_on_open(ws: websocket.WebSocketApp):
             self.join(channel, nick)
-
-            threading.Thread(target=ping, daemon=True).start()
+            self.__opened()
+            self.keepalive.start()
 
         self.ws.on_open = ws_on_open
 
@@ -117,9 +164,52 @@ class IDNSConnector(AbstractConnector):
         except (AttributeError, RuntimeError):
             raise RuntimeError("Connection is not started yet. Use start() first.")
 
-    def run_forever(self, channel: str, nick: str, password: Optional[str]):
+    def __ping(self):
+        self._send_now({"type": "ping", "group": self.channel})
+
+    @property
+    def rtt(self) -> Optional[float]:
+        return self.keepalive.rtt
+
+    def __opened(self):
+        if self._resuming:
+            self._resuming = False
+            self._attempt = 0
+            self.__emit(
+                "resumed",
+                reconnects=self.reconnects,
+                last_message_id=self._last_message_id,
+            )
+
+    def __emit(self, event_type: str, **extras):
+        chatter = getattr(self, "chatter", None)
+        if chatter is not None:
+            chatter.emit(event_type, **extras)
+
+    def run_forever(self, channel: str, nick: str, password: Optional[str] = None):
         self.__start(channel, nick, password)
-        self.ws.run_forever()
+        self.__loop()
+
+    def __loop(self):
+        while not self._closing:
+            self.ws.run_forever(ping_timeout=1)
+            self.keepalive.stop()
+            if self._closing:
+                return
+
+            self.__emit("disconnected")
+            delay = self.reconnect.delay(self._attempt) if self.reconnect else None
+            if delay is None:
+                return
+            self._attempt += 1
+            self.reconnects += 1
+            self._resuming = True
+            # The server replays history after lastMessageId on init, so only
+            # what was missed while offline comes back, flagged as history.
+            self.init_finished = False
+            self.__emit("reconnecting", attempt=self._attempt, delay=delay)
+            # quit() during the backoff wakes us up instead of reconnecting.
+            self._wake.wait(delay)
 
     def join(self, channel: str, nick: str):
         payload = {
@@ -130,9 +220,18 @@ class IDNSConnector(AbstractConnector):
             "userAgent": self.user_agent,
             "lastMessageId": self._last_message_id,
         }
-        self.send_dict(payload)
-
-    def quit(self):
+        self._send_now(payload)
+
+    def set_outbound(self, outbound: Optional[Outbound]):
+        self.outbound = outbound
+        if outbound is not None:
+            outbound.send = self._send_now
+
+    def quit(self, timeout: Optional[float] = 5):
+        self._closing = True
+        self._wake.set()
+        if self.outbound is not None:
+            self.outbound.flush(timeout)
         self.ws.close()
 
     def send_chat(self, text: str):
@@ -160,17 +259,27 @@ class IDNSConnector(AbstractConnector):
         self.send_chat(f"*{self.nick} {text}")
 
     def send_dict(self, message: dict):
-        self.send_string(json.dumps(message))
+        if self.outbound is None:
+            self._send_now(message)
+        elif message.get("type") == "message":
+            self.outbound.put(message, PRIORITY_NORMAL, message.get("group"))
+        else:
+            self.outbound.put(message, PRIORITY_HIGH)
+
+    def _send_now(self, message: dict):
+        self.send_string(self.codec.dumps(message))
 
     def send_string(self, message: str):
         if not self.ws.keep_running:
             raise RuntimeError("WebSocket is not connected.")
         for func in self.send_hooks:
             func(message)
+        if self.metrics is not None:
+            self.metrics.sent.inc()
         self.ws.send(message)
 
-    def parse_message(self, message: str) -> IDNSMsg:
-        return IDNSMsg(message, not self.init_finished)
+    def parse_message(self, message: Union[str, bytes]) -> IDNSMsg:
+        return IDNSMsg(message, not self.init_finished, self.codec)
 
 
 MessageType = Literal[
@@ -182,10 +291,47 @@ MessageType = Literal[
 ]
 
 
+# Frames the connector itself must decode: history/init state, message ids and pongs.
+_BOOKKEEPING_TYPES = frozenset({"message", "initFinished", "pong"})
+_TYPE_RE = re.compile(r'"type"\s*:\s*"([^"\\]*)"')
+_TYPE_RE_BYTES = re.compile(rb'"type"\s*:\s*"([^"\\]*)"')
+_MESSAGE_KEY_RE = re.compile(r'"message"\s*:\s*\{')
+_MESSAGE_KEY_RE_BYTES = re.compile(rb'"message"\s*:\s*\{')
+
+
+def peek_idns_type(data: Union[str, bytes]) -> Optional[str]:
+    # A nested message object has its own "type", so those frames are not peeked.
+    if isinstance(data, str):
+        if _MESSAGE_KEY_RE.search(data):
+            return "message"
+        match_ = _TYPE_RE.search(data)
+        return match_.group(1) if match_ else None
+    if _MESSAGE_KEY_RE_BYTES.search(data):
+        return "message"
+    match_ = _TYPE_RE_BYTES.search(data)
+    return match_.group(1).decode() if match_ else None
+
+
+def idns_frame_needed(data: Union[str, bytes], wanted: FrozenSet[str]) -> bool:
+    type_ = peek_idns_type(data)
+    # "command" frames are typed by their "name", which is not peeked.
+    return (
+        type_ is None
+        or type_ == "command"
+        or type_ in _BOOKKEEPING_TYPES
+        or type_ in wanted
+    )
+
+
 class IDNSMsg(AbstractMsg):
-    def __init__(self, data: str, is_history: bool) -> None:
+    def __init__(
+        self,
+        data: Union[str, bytes],
+        is_history: bool,
+        codec: Optional[AbstractCodec] = None,
+    ) -> None:
         self.raw_data = data
-        self.data: dict = json.loads(data)
+        self.data: dict = (codec or default_codec()).loads(data)
         self.is_history = is_history
 
         if "message" in self.data:
@@ -238,21 +384,30 @@ class IDNSMsg(AbstractMsg):
 
 
 class IDNSUserInfo(AbstractUserInfo):
+    __slots__ = ("nick", "avatar", "_data")
+
+    trip = None
+    color = None
+    level = None
+    utype = None
+    hash = None
+
     def __init__(self, *dicts):
-        self._data = {}
-        for dct in dicts:
-            self._data.update(dct)
+        # IDNS user info always comes from one message dict, so keep it as is.
+        if len(dicts) == 1:
+            self._data = dicts[0]
+        else:
+            self._data = {}
+            for dct in dicts:
+                self._data.update(dct)
 
-        self.trip = None
-        self.color = None
-        self.level = None
-        self.utype = None
-        self.hash = None
+        self.nick: Optional[str] = self._data.get("name")
+        self.avatar: Optional[str] = self._data.get("avatar")
 
-    @property
-    def nick(self) -> Optional[str]:
-        return self._data.get("name")
+    def get(self, key: str, default=None):
+        return self._data.get(key, default)
 
-    @property
-    def avatar(self) -> Optional[str]:
-        return self._data.get("avatar")
+    def __getattr__(self, name: str):
+        if not name.startswith("_") and name in self._data:
+            return self._data[name]
+        raise AttributeError(name)
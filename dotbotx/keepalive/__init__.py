@@ -0,0 +1 @@
+from .__module import Keepalive, Timer, TimerWheel, default_wheel
\ No newline at end of file
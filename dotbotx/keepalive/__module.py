@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger("dotbotx.keepalive")
+
+
+class Timer:
+    __slots__ = ("when", "callback", "cancelled")
+
+    def __init__(self, when: float, callback: Callable[[], Any]):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    # One thread serving every timer in the process. Callbacks run on that
+    # thread and must return quickly.
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Timer]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def call_later(self, delay: float, callback: Callable[[], Any]) -> Timer:
+        timer = Timer(time.monotonic() + delay, callback)
+        with self._cond:
+            heapq.heappush(self._heap, (timer.when, next(self._counter), timer))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.__run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return timer
+
+    def __len__(self) -> int:
+        return sum(not timer.cancelled for _, _, timer in self._heap)
+
+    def __run(self):
+        while True:
+            with self._cond:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                _, _, timer = heapq.heappop(self._heap)
+
+            try:
+                timer.callback()
+            except Exception:
+                logger.exception("Timer callback raised")
+
+
+_default_wheel: Optional[TimerWheel] = None
+
+
+def default_wheel() -> TimerWheel:
+    global _default_wheel
+    if _default_wheel is None:
+        _default_wheel = TimerWheel()
+    return _default_wheel
+
+
+class Keepalive:
+    # `wheel` may be a TimerWheel or an asyncio loop; both offer call_later().
+    def __init__(
+        self,
+        send_ping: Callable[[], Any],
+        interval: float = 30,
+        wheel: Any = None,
+    ):
+        self.send_ping = send_ping
+        self.interval = interval
+        self.wheel = wheel
+        self.rtt: Optional[float] = None
+        self.pings = 0
+        self.pongs = 0
+        self._sent_at: Optional[float] = None
+        self._timer: Any = None
+        self._running = False
+        # Bumped by start()/stop() so a tick already in flight cannot revive
+        # a stopped keepalive or run next to a restarted one.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self):
+        with self._lock:
+            self.__cancel()
+            self._running = True
+            self.__schedule(0)
+
+    def stop(self):
+        with self._lock:
+            self.__cancel()
+
+    def pong(self):
+        sent_at = self._sent_at
+        if sent_at is not None:
+            self.rtt = time.monotonic() - sent_at
+            self._sent_at = None
+        self.pongs += 1
+
+    def __cancel(self):
+        self._generation += 1
+        self._running = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._sent_at = None
+
+    def __schedule(self, delay: float):
+        # Called with the lock held; the state is set before the wheel can
+        # possibly run the tick.
+        generation = self._generation
+        # Not `self.wheel or ...`: an idle TimerWheel is empty, hence falsy.
+        wheel = self.wheel if self.wheel is not None else default_wheel()
+        self._timer = wheel.call_later(
+            delay, lambda: self.__tick(generation)
+        )
+
+    def __tick(self, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            # Stamped before sending: the pong may arrive before send_ping returns.
+            self._sent_at = time.monotonic()
+        try:
+            self.send_ping()
+        except RuntimeError:
+            # The socket is gone; whoever restarts it restarts the keepalive.
+            with self._lock:
+                if generation == self._generation:
+                    self.__cancel()
+            return
+        with self._lock:
+            if generation != self._generation:  # stopped while sending
+                return
+            self.pings += 1
+            self.__schedule(self.interval)
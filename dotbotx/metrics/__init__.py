@@ -0,0 +1,10 @@
+from .__module import (
+    ConnectorMetrics,
+    Counter,
+    Gauge,
+    Histogram,
+    Metrics,
+    apply_metrics,
+    callback_name,
+    instrument_callback,
+)
\ No newline at end of file
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+import functools
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core import Chatter, Context, MessageCallback
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+    float("inf"),
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Gauge:
+    __slots__ = ("value", "func")
+
+    def __init__(self, func: Optional[Callable[[], Any]] = None):
+        self.value: Any = 0
+        self.func = func
+
+    def set(self, value: Any):
+        self.value = value
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def dec(self, amount: int = 1):
+        self.value -= amount
+
+    def get(self) -> Any:
+        return self.func() if self.func is not None else self.value
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters: Dict[Tuple[str, Labels], Counter] = {}
+        self.gauges: Dict[Tuple[str, Labels], Gauge] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        key = (name, tuple(sorted(labels.items())))
+        if key not in self.counters:
+            self.counters[key] = Counter()
+        return self.counters[key]
+
+    def gauge(
+        self, name: str, func: Optional[Callable[[], Any]] = None, **labels: str
+    ) -> Gauge:
+        key = (name, tuple(sorted(labels.items())))
+        if key not in self.gauges:
+            self.gauges[key] = Gauge(func)
+        return self.gauges[key]
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(self.buckets)
+        return self.histograms[key]
+
+    def snapshot(self) -> Dict[str, List[dict]]:
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": counter.value}
+                for (name, labels), counter in list(self.counters.items())
+            ],
+            "gauges": [
+                {"name": name, "labels": dict(labels), "value": gauge.get()}
+                for (name, labels), gauge in list(self.gauges.items())
+            ],
+            "histograms": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "buckets": {
+                        str(bound): count
+                        for bound, count in zip(histogram.bounds, histogram.counts)
+                    },
+                }
+                for (name, labels), histogram in list(self.histograms.items())
+            ],
+        }
+
+    def prometheus(self) -> str:
+        lines: List[str] = []
+        typed = set()
+
+        def header(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), counter in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {counter.value}")
+        for (name, labels), gauge in sorted(self.gauges.items()):
+            value = gauge.get()
+            if value is None:
+                continue
+            header(name, "gauge")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class ConnectorMetrics:
+    # Pre-bound instruments, so the connector hot path is one attribute check
+    # when metrics are off and a couple of increments when they are on.
+    def __init__(self, metrics: Metrics, **labels: str):
+        self.received = metrics.counter("dotbotx_frames_received_total", **labels)
+        self.sent = metrics.counter("dotbotx_frames_sent_total", **labels)
+        self.parse_seconds = metrics.histogram("dotbotx_parse_seconds", **labels)
+        self.skipped = metrics.counter("dotbotx_frames_skipped_total", **labels)
+
+    def parse(self, parse_message: Callable[[Any], Any], data: Any):
+        self.received.inc()
+        started = time.perf_counter()
+        message = parse_message(data)
+        self.parse_seconds.observe(time.perf_counter() - started)
+        return message
+
+    def skip(self):
+        self.received.inc()
+        self.skipped.inc()
+
+
+def callback_name(callback: Callable) -> str:
+    while isinstance(callback, functools.partial):
+        callback = callback.func
+    module = getattr(callback, "__module__", None) or ""
+    name = getattr(callback, "__qualname__", None) or repr(callback)
+    return f"{module}.{name}" if module else name
+
+
+def instrument_callback(
+    metrics: Metrics,
+    callback: MessageCallback,
+    message_type: str,
+    **labels: str,
+) -> MessageCallback:
+    latency = metrics.histogram(
+        "dotbotx_callback_seconds",
+        callback=callback_name(callback),
+        type=message_type,
+        **labels,
+    )
+
+    from inspect import iscoroutinefunction
+
+    if iscoroutinefunction(callback):
+
+        async def timed_async(ctx: Context):
+            started = time.perf_counter()
+            try:
+                return await callback(ctx)  # type: ignore
+            finally:
+                latency.observe(time.perf_counter() - started)
+
+        return timed_async
+
+    def timed(ctx: Context):
+        started = time.perf_counter()
+        try:
+            return callback(ctx)
+        finally:
+            latency.observe(time.perf_counter() - started)
+
+    return timed
+
+
+def apply_metrics(chatter: Chatter, metrics: Optional[Metrics] = None) -> Metrics:
+    if metrics is None:
+        metrics = Metrics()
+    connector = chatter.connector
+    labels = {"site": connector.site, "channel": chatter.channel, "nick": chatter.nick}
+
+    connector.metrics = ConnectorMetrics(metrics, **labels)  # type: ignore
+    metrics.gauge(
+        "dotbotx_reconnects", lambda: getattr(connector, "reconnects", 0), **labels
+    )
+    metrics.gauge("dotbotx_rtt_seconds", lambda: getattr(connector, "rtt", None), **labels)
+    metrics.gauge(
+        "dotbotx_send_queue_depth",
+        lambda: connector.outbound.depth if getattr(connector, "outbound", None) else 0,  # type: ignore
+        **labels,
+    )
+
+    if hasattr(chatter, "set_metrics"):
+        chatter.set_metrics(metrics, **labels)  # type: ignore
+    return metrics
@@ -1 +1 @@
-from .__module import Module
\ No newline at end of file
+from .__module import Module, reload_module
\ No newline at end of file
@@ -1,7 +1,11 @@
 from collections import defaultdict
-from typing import DefaultDict, List, Optional, Union
+import importlib
+import sys
+from types import ModuleType
+from typing import DefaultDict, List, Optional, Tuple, Union
 
 from ..core import MessageCallback
+from ..dispatch import ErrorHandler, guard_callback
 
 
 class Module():
@@ -15,7 +19,13 @@ class Module():
         self,
         callback: MessageCallback,
         message_type: Optional[Union[str, List[str]]] = None,
+        timeout: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        coalesce: bool = False,
+        on_error: Optional[ErrorHandler] = None,
     ):
+        if timeout is not None or concurrency is not None or coalesce or on_error:
+            callback = guard_callback(callback, timeout, concurrency, coalesce, on_error)
         if message_type is None:
             self.callbacks.append(callback)
         elif isinstance(message_type, str):
@@ -24,13 +34,64 @@ class Module():
             for i in message_type:
                 self.typed_callbacks[i].append(callback)
 
-    def on(self, *message_types: str):
+    def on(self, *message_types: str, **options):
         def deco(func: MessageCallback):
             if len(message_types) == 0:
-                self.register_callback(func)
+                self.register_callback(func, **options)
             else:
-                for i in message_types:
-                    self.register_callback(func, i)
+                self.register_callback(func, list(message_types), **options)
             return func
 
         return deco
+
+
+def _find_name(source: ModuleType, module: Module) -> Optional[str]:
+    for name, value in list(vars(source).items()):
+        if value is module:
+            return name
+    return None
+
+
+def _locate(module: Module) -> Tuple[ModuleType, str]:
+    # Prefer the module that defines the instance: its class (for subclasses)
+    # or its callbacks. Importers such as the bot's own entry script also hold
+    # the instance, and __main__ cannot be reloaded at all.
+    candidates = [type(module).__module__]
+    callbacks = list(module.callbacks)
+    for typed in module.typed_callbacks.values():
+        callbacks.extend(typed)
+    candidates.extend(getattr(callback, "__module__", None) for callback in callbacks)
+
+    for source_name in dict.fromkeys(candidates):
+        source = sys.modules.get(source_name) if source_name else None
+        if source is None or source_name == "__main__":
+            continue
+        name = _find_name(source, module)
+        if name is not None:
+            return source, name
+
+    for source_name, source in list(sys.modules.items()):
+        if source_name == "__main__" or source is None:
+            continue
+        name = _find_name(source, module)
+        if name is not None:
+            return source, name
+    raise LookupError("Cannot find the Python module defining this Module instance.")
+
+
+def reload_module(
+    module: Module,
+    source: Optional[ModuleType] = None,
+    name: Optional[str] = None,
+) -> Module:
+    # Re-imports the file that defines `module` and returns the fresh instance
+    # stored under the same global name.
+    if source is None or name is None:
+        found_source, found_name = _locate(module)
+        source = source or found_source
+        name = name or found_name
+    importlib.reload(source)
+    new = getattr(source, name, None)
+    if not isinstance(new, Module):
+        raise TypeError(f"{source.__name__}.{name} is no longer a Module after reload.")
+    return new
@@ -0,0 +1 @@
+from .__module import PRIORITY_HIGH, PRIORITY_NORMAL, Outbound, TokenBucket
\ No newline at end of file
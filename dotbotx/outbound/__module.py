@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from collections import deque
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Hashable, List, Optional
+
+if TYPE_CHECKING:
+    import asyncio
+
+PRIORITY_HIGH = 0  # whispers, moderation and other commands
+PRIORITY_NORMAL = 1  # chat and emotes
+
+logger = logging.getLogger("dotbotx.outbound")
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        # Seconds until one token is available, refilling first.
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Item:
+    __slots__ = ("payload", "key")
+
+    def __init__(self, payload: dict, key: Optional[Hashable]):
+        self.payload = payload
+        self.key = key
+
+
+class Outbound:
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 5,
+        coalesce: bool = False,
+        max_length: int = 4000,
+        max_size: int = 1000,
+        retry_delay: float = 1.0,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.coalesce = coalesce
+        self.max_length = max_length
+        self.max_size = max_size
+        self.retry_delay = retry_delay
+
+        self.send: Optional[Callable[[dict], None]] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._lanes: Dict[int, Deque[_Item]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    @property
+    def depth(self) -> int:
+        return self._size
+
+    def put(
+        self,
+        payload: dict,
+        priority: int = PRIORITY_NORMAL,
+        coalesce_key: Optional[Hashable] = None,
+    ):
+        with self._lock:
+            lane = self._lanes.get(priority)
+            if lane is None:
+                lane = self._lanes[priority] = deque()
+                self._lanes = dict(sorted(self._lanes.items()))
+
+            # Queued chat lines to the same place may be merged into one message.
+            if self.coalesce and coalesce_key is not None and lane:
+                last = lane[-1]
+                if last.key == coalesce_key:
+                    text = f"{last.payload['text']}\n{payload['text']}"
+                    if len(text) <= self.max_length:
+                        last.payload["text"] = text
+                        self.coalesced += 1
+                        return
+
+            if self._size >= self.max_size:
+                # Make room at the expense of this priority or a lower one only;
+                # a queued command is never dropped for a chat line.
+                victim = next(
+                    (
+                        queued
+                        for level, queued in reversed(self._lanes.items())
+                        if queued and level >= priority
+                    ),
+                    None,
+                )
+                self.dropped += 1
+                if victim is None:
+                    return
+                victim.popleft()
+                self._size -= 1
+
+            lane.append(_Item(payload, coalesce_key))
+            self._size += 1
+        self.__wake()
+
+    def __pop(self, now: float) -> Optional[float]:
+        # Sends whatever the bucket allows; returns the delay until the next
+        # attempt, or None once the queue is empty.
+        while True:
+            with self._lock:
+                if self._size == 0:
+                    self._drained.notify_all()
+                    return None
+                delay = self.bucket.delay(now)
+                if delay > 0:
+                    return delay
+                lane = next(lane for lane in self._lanes.values() if lane)
+                item = lane.popleft()
+                self._size -= 1
+                self.bucket.take()
+
+            try:
+                self.send(item.payload)  # type: ignore
+            except RuntimeError:
+                # Not connected (yet): keep the message and try again later.
+                with self._lock:
+                    lane.appendleft(item)
+                    self._size += 1
+                return self.retry_delay
+            except Exception:
+                logger.exception("Failed to send queued message")
+            else:
+                self.sent += 1
+            now = time.monotonic()
+
+    def __wake(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.__run_on_loop)
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.__run_thread, daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def __run_thread(self):
+        while True:
+            delay = self.__pop(time.monotonic())
+            with self._lock:
+                if self._size == 0:
+                    self._wakeup.wait()
+                elif delay:
+                    self._wakeup.wait(delay)
+
+    def __run_on_loop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        delay = self.__pop(time.monotonic())
+        if delay is not None:
+            self._timer = self.loop.call_later(delay, self.__run_on_loop)  # type: ignore
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # Blocks until everything queued has been sent. Call it off the event
+        # loop when the loop drives this queue.
+        with self._lock:
+            return self._drained.wait_for(lambda: self._size == 0, timeout)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        import asyncio
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._size:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def clear(self) -> List[dict]:
+        with self._lock:
+            payloads = [item.payload for lane in self._lanes.values() for item in lane]
+            for lane in self._lanes.values():
+                lane.clear()
+            self._size = 0
+            self._drained.notify_all()
+        return payloads
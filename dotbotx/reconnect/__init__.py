@@ -0,0 +1 @@
+from .__module import Backoff
\ No newline at end of file
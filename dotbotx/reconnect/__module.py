@@ -0,0 +1,27 @@
+import random
+from typing import Optional
+
+
+class Backoff:
+    def __init__(
+        self,
+        initial: float = 1.0,
+        maximum: float = 60.0,
+        factor: float = 2.0,
+        jitter: float = 0.5,
+        max_attempts: Optional[int] = None,
+    ):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+
+    def delay(self, attempt: int) -> Optional[float]:
+        # Seconds to wait before reconnect attempt number `attempt` (0-based), or
+        # None when no attempts are left. Jitter spreads out bots that dropped
+        # together so they don't all come back at the same instant.
+        if self.max_attempts is not None and attempt >= self.max_attempts:
+            return None
+        delay = min(self.maximum, self.initial * self.factor**attempt)
+        return delay * (1 - self.jitter * random.random())
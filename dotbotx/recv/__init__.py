@@ -1 +1,9 @@
-from .__module import apply_recv, receiver, recv_ctx, recv_msg, queues
\ No newline at end of file
+from .__module import (
+    Receiver,
+    apply_recv,
+    default_receiver,
+    receiver,
+    recv_ctx,
+    recv_msg,
+    recv_unwrap,
+)
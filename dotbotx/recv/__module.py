@@ -1,36 +1,148 @@
-from typing import List
+from typing import Callable, Dict, Optional, Tuple
 import asyncio
+import threading
+import warnings
 
-from ..core import Context
+from ..abstract import AbstractMsg
+from ..core import Chatter, Context
 from ..xcore import XChatter
 
-queues: List[asyncio.Queue[Context]] = []
+Predicate = Callable[[Context], bool]
+WaiterKey = Tuple[Optional[str], Optional[str]]  # (message type, sender nick)
 
 
-async def recv_ctx():
-    queue: asyncio.Queue[Context] = asyncio.Queue()
+class _Waiter:
+    __slots__ = ("future", "predicate")
 
-    queues.append(queue)
+    def __init__(self, future: "asyncio.Future[Context]", predicate: Optional[Predicate]):
+        self.future = future
+        self.predicate = predicate
 
-    ctx = await queue.get()
-    queues.remove(queue)
 
-    return ctx
+class Receiver:
+    def __init__(self):
+        # Waiters are bucketed by what they filter on, so a message only visits
+        # the buckets it can match. Dicts keep FIFO order and O(1) removal.
+        self._waiters: Dict[WaiterKey, Dict[_Waiter, None]] = {}
+        self._loop_thread: Optional[int] = None
 
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._waiters.values())
 
-async def recv_msg():
-    return (await recv_ctx()).message
+    async def recv_ctx(
+        self,
+        message_type: Optional[str] = None,
+        nick: Optional[str] = None,
+        predicate: Optional[Predicate] = None,
+        timeout: Optional[float] = None,
+    ) -> Context:
+        loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
 
+        key = (message_type, nick)
+        waiter = _Waiter(loop.create_future(), predicate)
+        self._waiters.setdefault(key, {})[waiter] = None
+        try:
+            return await asyncio.wait_for(waiter.future, timeout)
+        finally:
+            bucket = self._waiters.get(key)
+            if bucket is not None:
+                bucket.pop(waiter, None)
+                if not bucket:
+                    del self._waiters[key]
 
-async def recv_unwrap():
-    ctx = await recv_ctx()
-    return ctx.chatter, ctx.message
+    async def recv_msg(self, *args, **kwargs) -> AbstractMsg:
+        return (await self.recv_ctx(*args, **kwargs)).message
 
+    async def recv_unwrap(self, *args, **kwargs) -> Tuple[Chatter, AbstractMsg]:
+        ctx = await self.recv_ctx(*args, **kwargs)
+        return ctx.chatter, ctx.message
+
+    def receive(self, ctx: Context):
+        # Registered as a plain callback: hop to the loop only when someone waits.
+        if not self._waiters:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self.deliver(ctx)
+        else:
+            ctx.chatter.loop.call_soon_threadsafe(self.deliver, ctx)  # type: ignore
+
+    def deliver(self, ctx: Context):
+        message_type = ctx.message.type
+        sender = ctx.message.sender
+        nick = sender.nick if sender is not None else None
+
+        keys = [(message_type, None), (None, None)]
+        if nick is not None:
+            keys[:0] = [(message_type, nick), (None, nick)]
+
+        for key in keys:
+            bucket = self._waiters.get(key)
+            if not bucket:
+                continue
+            for waiter in tuple(bucket):
+                if waiter.future.done():
+                    continue
+                if waiter.predicate is None or waiter.predicate(ctx):
+                    waiter.future.set_result(ctx)
+                    del bucket[waiter]
+
+
+# Serves the old chatter-less call forms, recv_ctx() etc., across every chatter
+# that went through apply_recv().
+default_receiver = Receiver()
+
+
+def apply_recv(chatter: XChatter, receiver: Optional[Receiver] = None) -> Receiver:
+    # Pass the same receiver to several chatters to wait on all of them at once.
+    if receiver is None:
+        receiver = Receiver()
+    chatter.receiver = receiver  # type: ignore
+    chatter.register_callback(receiver.receive)
+    if receiver is not default_receiver:
+        # Returns at once while nobody uses the deprecated forms.
+        chatter.register_callback(default_receiver.receive)
+    return receiver
 
-async def receiver(ctx: Context):
-    for queue in queues:
-        await queue.put(ctx)
 
+def _deprecated(name: str):
+    warnings.warn(
+        f"{name}() without a chatter is deprecated; pass the chatter, "
+        "or use the Receiver returned by apply_recv().",
+        DeprecationWarning,
+        stacklevel=3,
+    )
 
-def apply_recv(chatter: XChatter):
-    chatter.register_callback(receiver)
+
+async def recv_ctx(chatter: Optional[Chatter] = None, *args, **kwargs) -> Context:
+    if chatter is None:
+        _deprecated("recv_ctx")
+        return await default_receiver.recv_ctx(*args, **kwargs)
+    return await chatter.receiver.recv_ctx(*args, **kwargs)  # type: ignore
+
+
+async def recv_msg(chatter: Optional[Chatter] = None, *args, **kwargs) -> AbstractMsg:
+    if chatter is None:
+        _deprecated("recv_msg")
+        return await default_receiver.recv_msg(*args, **kwargs)
+    return (await recv_ctx(chatter, *args, **kwargs)).message
+
+
+async def recv_unwrap(
+    chatter: Optional[Chatter] = None, *args, **kwargs
+) -> Tuple[Chatter, AbstractMsg]:
+    if chatter is None:
+        _deprecated("recv_unwrap")
+        return await default_receiver.recv_unwrap(*args, **kwargs)
+    ctx = await recv_ctx(chatter, *args, **kwargs)
+    return ctx.chatter, ctx.message
+
+
+async def receiver(ctx: Context):
+    # The old module-level callback; apply_recv() registers what it needs now.
+    warnings.warn(
+        "dotbotx.recv.receiver is deprecated; use apply_recv().",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    default_receiver.receive(ctx)
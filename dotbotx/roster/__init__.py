@@ -0,0 +1 @@
+from .__module import Roster, RosterUser, apply_roster
\ No newline at end of file
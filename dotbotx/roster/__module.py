@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from ..abstract import AbstractUserInfo
+from ..core import Context
+from ..xcore import XChatter
+
+USER_FIELDS = ("nick", "trip", "color", "level", "utype", "hash", "userid", "isBot")
+
+
+class RosterUser(AbstractUserInfo):
+    __slots__ = ("nick", "trip", "color", "level", "utype", "hash", "userid", "is_bot")
+
+    def __init__(self, *dicts):
+        self.nick: Optional[str] = None
+        self.trip: Optional[str] = None
+        self.color: Optional[str] = None
+        self.level: Optional[str] = None
+        self.utype: Optional[str] = None
+        self.hash: Optional[str] = None
+        self.userid: Optional[int] = None
+        self.is_bot: Optional[bool] = None
+        for dct in dicts:
+            self.update(dct)
+
+    def update(self, data: dict):
+        get = data.get
+        for field, attr in zip(USER_FIELDS, self.__slots__):
+            value = get(field)
+            if value is not None:
+                setattr(self, attr, value)
+
+    def __repr__(self) -> str:
+        return f"RosterUser(nick={self.nick!r}, trip={self.trip!r}, hash={self.hash!r})"
+
+
+class Roster:
+    def __init__(self):
+        self._by_nick: Dict[str, RosterUser] = {}
+        self._by_trip: Dict[str, Set[RosterUser]] = {}
+        self._by_hash: Dict[str, Set[RosterUser]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_nick)
+
+    def __iter__(self) -> Iterator[RosterUser]:
+        return iter(tuple(self._by_nick.values()))
+
+    def __contains__(self, nick: str) -> bool:
+        return nick in self._by_nick
+
+    def get(self, nick: str) -> Optional[RosterUser]:
+        return self._by_nick.get(nick)
+
+    def by_trip(self, trip: str) -> Tuple[RosterUser, ...]:
+        return tuple(self._by_trip.get(trip, ()))
+
+    def by_hash(self, hash: str) -> Tuple[RosterUser, ...]:
+        return tuple(self._by_hash.get(hash, ()))
+
+    def lookup(self, user_info: Optional[AbstractUserInfo]) -> Optional[RosterUser]:
+        if user_info is None or user_info.nick is None:
+            return None
+        return self._by_nick.get(user_info.nick)
+
+    @property
+    def nicks(self) -> Tuple[str, ...]:
+        return tuple(self._by_nick)
+
+    def clear(self):
+        self._by_nick.clear()
+        self._by_trip.clear()
+        self._by_hash.clear()
+
+    def __index(self, user: RosterUser):
+        if user.trip:
+            self._by_trip.setdefault(user.trip, set()).add(user)
+        if user.hash:
+            self._by_hash.setdefault(user.hash, set()).add(user)
+
+    def __unindex(self, user: RosterUser):
+        for index, key in ((self._by_trip, user.trip), (self._by_hash, user.hash)):
+            if key and key in index:
+                index[key].discard(user)
+                if not index[key]:
+                    del index[key]
+
+    def add(self, data: dict) -> Optional[RosterUser]:
+        nick = data.get("nick")
+        if nick is None:
+            return None
+        user = self._by_nick.get(nick)
+        if user is None:
+            user = self._by_nick[nick] = RosterUser(data)
+        else:
+            self.__unindex(user)
+            user.update(data)
+        self.__index(user)
+        return user
+
+    def remove(self, nick: str) -> Optional[RosterUser]:
+        user = self._by_nick.pop(nick, None)
+        if user is not None:
+            self.__unindex(user)
+        return user
+
+    def rename(self, old: str, new: str):
+        user = self._by_nick.pop(old, None)
+        if user is not None:
+            user.nick = new
+            self._by_nick[new] = user
+
+    def update(self, ctx: Context):
+        message = ctx.message
+        type_ = message.type
+        if type_ == "onlineSet":
+            self.clear()
+            for data in message.data.get("users", ()):
+                self.add(data)
+        elif type_ in ("onlineAdd", "updateUser"):
+            self.add(message.data)
+        elif type_ == "onlineRemove":
+            self.remove(message.data.get("nick"))  # type: ignore
+        elif type_ == "changeNick":
+            self.rename(message.extras["oldNick"], message.extras["newNick"])
+        elif type_ == "disconnected":
+            # Rebuilt from the onlineSet sent after a reconnect.
+            self.clear()
+
+
+def apply_roster(chatter: XChatter) -> Roster:
+    roster = Roster()
+    chatter.register_callback(
+        roster.update,
+        [
+            "onlineSet",
+            "onlineAdd",
+            "onlineRemove",
+            "updateUser",
+            "changeNick",
+            "disconnected",
+        ],
+    )
+    return roster
@@ -0,0 +1 @@
+from .__module import Router
\ No newline at end of file
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..core import Context, MessageCallback
+from ..module import Module
+
+_HANDLERS = ""  # trie key holding the handlers of the prefix ending at a node
+_INLINE_FLAGS = ((re.I, "i"), (re.M, "m"), (re.S, "s"), (re.X, "x"))
+# Numeric backreferences and conditionals would point at the wrong group once
+# the pattern is embedded in the combined alternation.
+_NUMERIC_GROUP_REF = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(\d")
+
+
+async def _await_all(awaitables: list):
+    for awaitable in awaitables:
+        await awaitable
+
+
+class Router(Module):
+    def __init__(self, message_types: Iterable[str] = ("chat", "whisper")):
+        super().__init__()
+        self.commands: Dict[str, List[MessageCallback]] = {}
+        self.exacts: Dict[str, List[MessageCallback]] = {}
+        self.prefixes: Dict[str, List[MessageCallback]] = {}
+        self.regexes: List[Tuple[re.Pattern, MessageCallback]] = []
+
+        self._trie: dict = {}
+        self._matcher: Optional[re.Pattern] = None
+        self._compiled = True
+
+        self.register_callback(self.route, list(message_types))
+
+    def command(self, *names: str):
+        # `!name arg1 arg2`: the first word of the message must equal a name.
+        def deco(func: MessageCallback):
+            for name in names:
+                self.commands.setdefault(name, []).append(func)
+            return func
+
+        return deco
+
+    def exact(self, *texts: str):
+        def deco(func: MessageCallback):
+            for text in texts:
+                self.exacts.setdefault(text, []).append(func)
+            return func
+
+        return deco
+
+    def prefix(self, *prefixes: str):
+        def deco(func: MessageCallback):
+            for prefix in prefixes:
+                self.prefixes.setdefault(prefix, []).append(func)
+            self._compiled = False
+            return func
+
+        return deco
+
+    def regex(self, pattern: str, flags: int = 0):
+        def deco(func: MessageCallback):
+            self.regexes.append((re.compile(pattern, flags), func))
+            self._compiled = False
+            return func
+
+        return deco
+
+    def compile(self):
+        trie: dict = {}
+        for prefix, handlers in self.prefixes.items():
+            node = trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node.setdefault(_HANDLERS, []).extend(handlers)
+
+        matcher = None
+        if self.regexes and not any(
+            isinstance(pattern.pattern, bytes) or _NUMERIC_GROUP_REF.search(pattern.pattern)
+            for pattern, _ in self.regexes
+        ):
+            # Each alternative is `lazy prefix + pattern` and the whole thing is
+            # matched at position 0, so alternative 0 is tried at every offset
+            # before alternative 1 is: the first registered pattern wins, at its
+            # leftmost match, exactly like searching the patterns one by one.
+            alternatives = []
+            for i, (pattern, _) in enumerate(self.regexes):
+                flags = "".join(f for flag, f in _INLINE_FLAGS if pattern.flags & flag)
+                body = f"(?{flags}:{pattern.pattern})" if flags else pattern.pattern
+                alternatives.append(f"(?:(?s:.*?)(?P<_{i}>{body}))")
+            try:
+                matcher = re.compile("|".join(alternatives))
+            except re.error:
+                # Patterns whose group names clash can't share one alternation.
+                matcher = None
+
+        self._trie = trie
+        self._matcher = matcher
+        self._compiled = True
+
+    def route(self, ctx: Context):
+        text = ctx.message.text
+        if not text:
+            return
+        if not self._compiled:
+            self.compile()
+
+        pending = []
+
+        first, _, rest = text.partition(" ")
+        for handler in self.commands.get(first, ()):
+            pending.append(self.__call(handler, ctx, first, rest.split(), None))
+
+        for handler in self.exacts.get(text, ()):
+            pending.append(self.__call(handler, ctx, text, [], None))
+
+        node = self._trie
+        for i, char in enumerate(text):
+            node = node.get(char)  # type: ignore
+            if node is None:
+                break
+            for handler in node.get(_HANDLERS, ()):
+                prefix = text[: i + 1]
+                pending.append(
+                    self.__call(handler, ctx, prefix, text[i + 1 :].split(), None)
+                )
+
+        # Regex triggers are tried in registration order and the first hit wins.
+        if self._matcher is not None:
+            combined = self._matcher.match(text)
+            if combined is not None:
+                group = combined.lastgroup
+                pattern, handler = self.regexes[int(group[1:])]  # type: ignore
+                # Anchored at the known start (not a second search), so the
+                # handler gets a match object with its own group numbering.
+                match = pattern.match(text, combined.start(group))
+                pending.append(self.__call(handler, ctx, None, list(match.groups()), match))  # type: ignore
+        else:
+            for pattern, handler in self.regexes:
+                match = pattern.search(text)
+                if match is not None:
+                    pending.append(self.__call(handler, ctx, None, list(match.groups()), match))
+                    break
+
+        awaitables = [ret for ret in pending if ret is not None]
+        if awaitables:
+            return _await_all(awaitables)
+
+    def __call(
+        self,
+        handler: MessageCallback,
+        ctx: Context,
+        command: Optional[str],
+        args: List[str],
+        match: Optional[re.Match],
+    ):
+        routed = Context(ctx.chatter, ctx.message)
+        routed.command = command
+        routed.args = args
+        routed.match = match
+        return handler(routed)
@@ -0,0 +1 @@
+from .__module import Session, SessionKey, SessionManager, TTLStore, session_key
\ No newline at end of file
@@ -0,0 +1,296 @@
+import asyncio
+from collections import OrderedDict, deque
+import functools
+import threading
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Hashable,
+    Iterable,
+    Optional,
+    Tuple,
+)
+
+from ..core import Chatter, Context
+from ..module import Module
+
+# (channel, "trip" or "nick", value): users with a trip keep their session
+# across nick changes.
+SessionKey = Tuple[Optional[str], str, str]
+
+
+def session_key(ctx: Context) -> Optional[SessionKey]:
+    sender = ctx.message.sender
+    if sender is None:
+        return None
+    channel = ctx.chatter.channel
+    if sender.trip:
+        return (channel, "trip", sender.trip)
+    return (channel, "nick", sender.nick)
+
+
+class TTLStore:
+    # LRU ordered by last access; the TTL slides on every get/set, so expired
+    # entries are always at the front.
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, self) is not self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        now = time.monotonic()
+        if self.ttl is not None and now - entry[0] > self.ttl:
+            del self._data[key]
+            return default
+        self._data[key] = (now, entry[1])
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def setdefault(self, key: Hashable, factory: Callable[[], Any] = dict) -> Any:
+        value = self.get(key, self)
+        if value is self:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def expire(self) -> int:
+        if self.ttl is None:
+            return 0
+        deadline = time.monotonic() - self.ttl
+        expired = 0
+        while self._data:
+            key, (touched, _) = next(iter(self._data.items()))
+            if touched > deadline:
+                break
+            del self._data[key]
+            expired += 1
+        return expired
+
+    def clear(self):
+        self._data.clear()
+
+
+class Session:
+    def __init__(self, manager: "SessionManager", key: SessionKey, ctx: Context):
+        self.manager = manager
+        self.key = key
+        self.ctx = ctx
+        self.state: dict = manager.state.setdefault(key)
+        self.task: Optional[asyncio.Task] = asyncio.current_task()
+        self.last_active = time.monotonic()
+        self.closed = False
+        self._inbox: Deque[Context] = deque(maxlen=manager.max_inbox)
+        self._waiter: Optional[asyncio.Future] = None
+
+    @property
+    def chatter(self) -> Chatter:
+        return self.ctx.chatter
+
+    def _push(self, ctx: Context):
+        if self.closed:
+            return
+        self._inbox.append(ctx)
+        self.last_active = time.monotonic()
+        self.manager._touch(self)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def next(self, timeout: Optional[float] = None) -> Context:
+        if timeout is None:
+            timeout = self.manager.idle_timeout
+        self.last_active = time.monotonic()
+        self.manager._touch(self)
+        while not self._inbox:
+            if self.closed:
+                raise asyncio.CancelledError()
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            finally:
+                self._waiter = None
+        self.ctx = self._inbox.popleft()
+        return self.ctx
+
+    async def next_text(self, timeout: Optional[float] = None) -> str:
+        return (await self.next(timeout)).message.text  # type: ignore
+
+    async def ask(self, text: str, timeout: Optional[float] = None) -> str:
+        self.reply(text)
+        return await self.next_text(timeout)
+
+    def reply(self, text: str):
+        self.ctx.reply(text)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.manager._discard(self)
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.cancel()
+
+    def cancel(self):
+        task = self.task
+        self.close()
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    async def __aenter__(self) -> "Session":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class SessionManager(Module):
+    def __init__(
+        self,
+        message_types: Iterable[str] = ("chat", "whisper"),
+        idle_timeout: float = 120.0,
+        max_sessions: int = 1000,
+        max_inbox: int = 16,
+        state_size: int = 10000,
+        state_ttl: Optional[float] = 3600.0,
+        sweep_interval: float = 10.0,
+    ):
+        super().__init__()
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_inbox = max_inbox
+        self.sweep_interval = sweep_interval
+
+        # Ordered by last activity, like TTLStore. Only mutated on the loop.
+        self.sessions: "OrderedDict[SessionKey, Session]" = OrderedDict()
+        self.state = TTLStore(state_size, state_ttl)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._sweeper: Optional[asyncio.TimerHandle] = None
+
+        self.register_callback(self.route, list(message_types))
+
+    def route(self, ctx: Context):
+        # Cheap dict probe on the receiving thread; hop to the loop only when a
+        # conversation is actually waiting for this user.
+        if not self.sessions:
+            return
+        key = session_key(ctx)
+        if key is None or key not in self.sessions:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._deliver(key, ctx)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, key, ctx)  # type: ignore
+
+    def _deliver(self, key: SessionKey, ctx: Context):
+        session = self.sessions.get(key)
+        if session is not None:
+            session._push(ctx)
+
+    def _touch(self, session: Session):
+        if self.sessions.get(session.key) is session:
+            self.sessions.move_to_end(session.key)
+
+    def _discard(self, session: Session):
+        if self.sessions.get(session.key) is session:
+            del self.sessions[session.key]
+
+    def get(self, ctx: Context) -> Optional[Session]:
+        key = session_key(ctx)
+        return None if key is None else self.sessions.get(key)
+
+    def open(self, ctx: Context) -> Session:
+        key = session_key(ctx)
+        if key is None:
+            raise ValueError("Cannot open a session for a message without a sender.")
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+            self._schedule_sweep()
+
+        # A user only has one conversation at a time; a new one replaces it.
+        previous = self.sessions.get(key)
+        if previous is not None:
+            previous.cancel()
+        while len(self.sessions) >= self.max_sessions:
+            _, oldest = next(iter(self.sessions.items()))
+            oldest.cancel()
+
+        session = Session(self, key, ctx)
+        self.sessions[key] = session
+        return session
+
+    def conversation(self, func: Callable[[Session], Awaitable[Any]]):
+        # Turns `async def f(session)` into a callback usable with on() or a Router.
+        @functools.wraps(func)
+        async def handler(ctx: Context):
+            async with self.open(ctx) as session:
+                try:
+                    await func(session)
+                except asyncio.TimeoutError:
+                    pass
+
+        return handler
+
+    def teardown(self, chatter: Chatter):
+        if self._loop is None:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._cancel_for(chatter)
+        else:
+            self._loop.call_soon_threadsafe(self._cancel_for, chatter)
+
+    def _cancel_for(self, chatter: Chatter):
+        for session in list(self.sessions.values()):
+            if session.chatter is chatter:
+                session.cancel()
+
+    def sweep(self) -> int:
+        deadline = time.monotonic() - self.idle_timeout
+        cancelled = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_active > deadline:
+                break
+            session.cancel()
+            cancelled += 1
+        self.state.expire()
+        return cancelled
+
+    def _schedule_sweep(self):
+        def tick():
+            self.sweep()
+            self._schedule_sweep()
+
+        self._sweeper = self._loop.call_later(self.sweep_interval, tick)  # type: ignore
+
+    def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for session in list(self.sessions.values()):
+            session.cancel()
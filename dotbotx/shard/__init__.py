@@ -0,0 +1 @@
+from .__module import BotSpec, ChatterFactory, ShardLink, Supervisor, current_shard
\ No newline at end of file
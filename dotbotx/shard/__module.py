@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..aio import AsyncChatter
+from ..hub import Hub
+
+logger = logging.getLogger("dotbotx.shard")
+
+# Must be picklable (a module-level function or functools.partial of one):
+# shards are started with the "spawn" method by default.
+ChatterFactory = Callable[[], AsyncChatter]
+BotSpec = Tuple[str, ChatterFactory]
+
+_current: Optional["ShardLink"] = None
+
+
+def current_shard() -> Optional["ShardLink"]:
+    return _current
+
+
+class ShardLink:
+    # The worker side of the control pipe. Modules use it (via current_shard())
+    # to talk to bots that may live in another process.
+    def __init__(self, index: int, conn: Connection, hub: Hub, bots: Dict[str, AsyncChatter]):
+        self.index = index
+        self.hub = hub
+        self.bots = bots
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, message: tuple):
+        with self._lock:
+            self._conn.send(message)
+
+    def call(self, name: str, method: str, *args):
+        chatter = self.bots.get(name)
+        if chatter is None:
+            self.send(("route", name, method, args))
+        else:
+            self.hub.loop.call_soon_threadsafe(getattr(chatter, method), *args)  # type: ignore
+
+    def chat(self, name: str, text: str):
+        self.call(name, "chat", text)
+
+    def whisper(self, name: str, text: str, to: str):
+        self.call(name, "whisper", text, to)
+
+    def me(self, name: str, text: str):
+        self.call(name, "me", text)
+
+    def metrics(self) -> dict:
+        seen = {}
+        for chatter in self.bots.values():
+            metrics = getattr(chatter, "metrics", None)
+            if metrics is not None:
+                seen[id(metrics)] = metrics
+        return {
+            "status": self.hub.status(),
+            "metrics": [metrics.snapshot() for metrics in seen.values()],
+        }
+
+
+def _reload(chatter: AsyncChatter, config: Any):
+    reload_config = getattr(chatter, "reload_config", None)
+    if reload_config is not None:
+        reload_config(config)
+
+
+def _worker_main(index: int, specs: List[BotSpec], conn: Connection):
+    global _current
+    hub = Hub()
+    bots = {name: hub.add(factory()) for name, factory in specs}
+    link = _current = ShardLink(index, conn, hub, bots)
+    hub.start()
+    link.send(("ready",))
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            op = message[0]
+            if op == "stop":
+                break
+            elif op == "call":
+                _, name, method, args = message
+                link.call(name, method, *args)
+            elif op == "reload":
+                _, name, config = message
+                for bot_name, chatter in bots.items():
+                    if name is None or name == bot_name:
+                        hub.loop.call_soon_threadsafe(_reload, chatter, config)  # type: ignore
+            elif op == "metrics":
+                link.send(("metrics", message[1], link.metrics()))
+    finally:
+        hub.stop()
+        conn.close()
+
+
+class _Shard:
+    def __init__(self, index: int):
+        self.index = index
+        self.specs: List[BotSpec] = []
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.conn: Optional[Connection] = None
+        self.restarts = 0
+        self.ready = threading.Event()
+
+
+class _Pending:
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.replies: List[dict] = []
+        self.done = threading.Event()
+
+    def add(self, reply: dict):
+        self.replies.append(reply)
+        if len(self.replies) >= self.expected:
+            self.done.set()
+
+
+class Supervisor:
+    def __init__(
+        self,
+        shards: Optional[int] = None,
+        start_method: str = "spawn",
+        restart_delay: float = 1.0,
+    ):
+        self.context = multiprocessing.get_context(start_method)
+        self.shards = [_Shard(i) for i in range(shards or os.cpu_count() or 1)]
+        self.restart_delay = restart_delay
+        self.owners: Dict[str, _Shard] = {}
+
+        self._next = itertools.cycle(self.shards)
+        self._running = False
+        self._monitor: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending: Dict[int, _Pending] = {}
+
+    def add(self, name: str, factory: ChatterFactory) -> int:
+        if self._running:
+            raise RuntimeError("Bots must be added before start().")
+        if name in self.owners:
+            raise ValueError(f"Duplicate bot name: {name!r}")
+        shard = next(self._next)
+        shard.specs.append((name, factory))
+        self.owners[name] = shard
+        return shard.index
+
+    def __spawn(self, shard: _Shard):
+        parent, child = self.context.Pipe()
+        shard.ready.clear()
+        shard.conn = parent
+        shard.process = self.context.Process(
+            target=_worker_main,
+            args=(shard.index, shard.specs, child),
+            name=f"dotbotx-shard-{shard.index}",
+            daemon=True,
+        )
+        shard.process.start()
+        child.close()
+
+    def start(self, timeout: Optional[float] = 30):
+        if self._running:
+            raise RuntimeError("Already running")
+        self._running = True
+        for shard in self.shards:
+            if shard.specs:
+                self.__spawn(shard)
+        self._monitor = threading.Thread(target=self.__monitor, daemon=True)
+        self._monitor.start()
+        for shard in self.shards:
+            if shard.specs:
+                shard.ready.wait(timeout)
+
+    def __monitor(self):
+        restart_at: Dict[_Shard, float] = {}
+        while self._running:
+            with self._lock:
+                live = [s for s in self.shards if s.process is not None]
+            waitables: Dict[Any, Tuple[str, _Shard]] = {}
+            for shard in live:
+                waitables[shard.conn] = ("conn", shard)
+                waitables[shard.process.sentinel] = ("exit", shard)  # type: ignore
+
+            timeout = 0.5
+            if restart_at:
+                timeout = max(0.0, min(min(restart_at.values()) - time.monotonic(), timeout))
+            for ready in wait(list(waitables), timeout):
+                kind, shard = waitables[ready]
+                if kind == "conn":
+                    self.__receive(shard)
+                elif self._running and shard.process is not None:
+                    # Only the crashed shard is restarted; the others keep running.
+                    # The sentinel can fire a moment before the exit status can
+                    # be collected, so give the join a little slack.
+                    shard.process.join(1)
+                    logger.warning(
+                        "Shard %s exited with code %s, restarting",
+                        shard.index,
+                        shard.process.exitcode,
+                    )
+                    with self._lock:
+                        shard.process = None
+                        shard.conn.close()  # type: ignore
+                    restart_at[shard] = time.monotonic() + self.restart_delay
+
+            now = time.monotonic()
+            for shard, at in list(restart_at.items()):
+                if at <= now and self._running:
+                    del restart_at[shard]
+                    shard.restarts += 1
+                    with self._lock:
+                        self.__spawn(shard)
+
+    def __receive(self, shard: _Shard):
+        try:
+            message = shard.conn.recv()  # type: ignore
+        except (EOFError, OSError):
+            return
+        op = message[0]
+        if op == "ready":
+            shard.ready.set()
+        elif op == "route":
+            _, name, method, args = message
+            self.call(name, method, *args)
+        elif op == "metrics":
+            _, request_id, data = message
+            pending = self._pending.get(request_id)
+            if pending is not None:
+                data["shard"] = shard.index
+                pending.add(data)
+
+    def __send(self, shard: _Shard, message: tuple) -> bool:
+        with self._lock:
+            if shard.conn is None or shard.process is None:
+                return False
+            try:
+                shard.conn.send(message)
+                return True
+            except (BrokenPipeError, OSError):
+                return False
+
+    def call(self, name: str, method: str, *args) -> bool:
+        shard = self.owners.get(name)
+        if shard is None:
+            logger.warning("No shard runs bot %r", name)
+            return False
+        return self.__send(shard, ("call", name, method, args))
+
+    def chat(self, name: str, text: str) -> bool:
+        return self.call(name, "chat", text)
+
+    def whisper(self, name: str, text: str, to: str) -> bool:
+        return self.call(name, "whisper", text, to)
+
+    def reload(self, config: Any = None, name: Optional[str] = None):
+        # Hands `config` to chatter.reload_config(config) on each bot's loop (all
+        # bots, or only `name`). AsyncChatter stores it as `config`; override
+        # reload_config to apply it. Bots without the method are skipped.
+        shards = self.shards if name is None else [self.owners[name]]
+        for shard in shards:
+            self.__send(shard, ("reload", name, config))
+
+    def metrics(self, timeout: float = 5) -> List[dict]:
+        # Shards that are down (e.g. restarting) are simply missing from the result.
+        request_id = next(self._ids)
+        shards = [s for s in self.shards if s.specs]
+        pending = self._pending[request_id] = _Pending(len(shards))
+        try:
+            sent = sum(self.__send(s, ("metrics", request_id)) for s in shards)
+            pending.expected = sent
+            if len(pending.replies) >= sent:
+                pending.done.set()
+            pending.done.wait(timeout)
+            return sorted(pending.replies, key=lambda r: r["shard"])
+        finally:
+            del self._pending[request_id]
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "shard": shard.index,
+                "bots": [name for name, _ in shard.specs],
+                "alive": shard.process is not None and shard.process.is_alive(),
+                "pid": shard.process.pid if shard.process is not None else None,
+                "restarts": shard.restarts,
+            }
+            for shard in self.shards
+            if shard.specs
+        ]
+
+    def stop(self, timeout: Optional[float] = 10):
+        self._running = False
+        for shard in self.shards:
+            self.__send(shard, ("stop",))
+        for shard in self.shards:
+            if shard.process is not None:
+                shard.process.join(timeout)
+                if shard.process.is_alive():
+                    shard.process.terminate()
+                shard.process = None
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+
+    def wait(self):
+        if self._monitor is None:
+            raise RuntimeError("Supervisor is not started yet. Use start() first.")
+        self._monitor.join()
+
+    def run(self):
+        self.start()
+        try:
+            self.wait()
+        except KeyboardInterrupt:
+            self.stop()
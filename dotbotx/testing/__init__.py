@@ -0,0 +1 @@
+from .__module import LocalServer, hc_responder, idns_responder
\ No newline at end of file
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Callable, List, Optional, Set
+
+from websockets.asyncio.server import Server, ServerConnection, serve
+
+Responder = Callable[["LocalServer", ServerConnection, str], None]
+
+
+class LocalServer:
+    def __init__(
+        self,
+        responder: Optional[Responder] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.responder = responder
+        self.host = host
+        self.port = port
+        self.received: List[str] = []
+        self.connections: Set[ServerConnection] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/"
+
+    def start(self):
+        if self._thread is not None:
+            raise RuntimeError("Already running")
+        self._thread = threading.Thread(target=self.__run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __run(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.__serve())
+        self.loop.close()
+
+    async def __serve(self):
+        async with serve(self.__handler, self.host, self.port) as server:
+            self._server = server
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await server.wait_closed()
+
+    async def __handler(self, conn: ServerConnection):
+        self.connections.add(conn)
+        try:
+            async for data in conn:
+                data = data if isinstance(data, str) else data.decode()
+                self.received.append(data)
+                if self.responder is not None:
+                    self.responder(self, conn, data)
+        except Exception:
+            pass
+        finally:
+            self.connections.discard(conn)
+
+    def stop(self):
+        if self._server is not None and self.loop is not None:
+            self.loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+        self._server = None
+        self._ready.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def send(self, conn: ServerConnection, message: Any):
+        if not isinstance(message, str):
+            message = json.dumps(message)
+        if self.__in_loop():
+            self.loop.create_task(conn.send(message))  # type: ignore
+        else:
+            asyncio.run_coroutine_threadsafe(conn.send(message), self.loop)  # type: ignore
+
+    def broadcast(self, message: Any, channel: Optional[str] = None):
+        for conn in list(self.connections):
+            if channel is None or getattr(conn, "channel", None) == channel:
+                self.send(conn, message)
+
+    def kill(self):
+        # Drop every connection without a closing handshake, like a network failure.
+        def abort():
+            for conn in list(self.connections):
+                conn.transport.abort()
+
+        self.loop.call_soon_threadsafe(abort)  # type: ignore
+
+    def wait_for(
+        self, predicate: Callable[[List[str]], bool], timeout: float = 5
+    ) -> bool:
+        deadline = time.monotonic() + timeout
+        while not predicate(self.received):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def __in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+
+def hc_responder(server: LocalServer, conn: ServerConnection, data: str):
+    # A tiny subset of hack.chat: join, chat, emote and whisper.
+    payload = json.loads(data)
+    cmd = payload.get("cmd")
+    nick = getattr(conn, "nick", None)
+    channel = getattr(conn, "channel", None)
+    now = int(time.time() * 1000)
+
+    if cmd == "join":
+        conn.nick = payload["nick"]  # type: ignore
+        conn.channel = payload["channel"]  # type: ignore
+        peers = [c for c in server.connections if getattr(c, "channel", None) == conn.channel]  # type: ignore
+        users = [{"nick": c.nick, "trip": "", "hash": "local"} for c in peers]  # type: ignore
+        server.send(conn, {"cmd": "onlineSet", "nicks": [u["nick"] for u in users], "users": users, "time": now})
+        for other in peers:
+            if other is not conn:
+                server.send(other, {"cmd": "onlineAdd", "nick": payload["nick"], "trip": "", "hash": "local", "time": now})
+    elif cmd == "chat":
+        server.broadcast({"cmd": "chat", "nick": nick, "text": payload["text"], "time": now}, channel)
+    elif cmd == "emote":
+        server.broadcast({"cmd": "emote", "nick": nick, "text": f"@{nick} {payload['text']}", "time": now}, channel)
+    elif cmd == "whisper":
+        for other in server.connections:
+            if getattr(other, "nick", None) == payload["nick"] and getattr(other, "channel", None) == channel:
+                server.send(other, {"cmd": "info", "type": "whisper", "from": nick, "text": f"{nick} whispered: {payload['text']}", "time": now})
+        server.send(conn, {"cmd": "info", "type": "whisper", "from": nick, "text": f"You whispered to @{payload['nick']}: {payload['text']}", "time": now})
+
+
+def idns_responder(server: LocalServer, conn: ServerConnection, data: str):
+    # A tiny subset of the IDNS portal: init, ping and message.
+    payload = json.loads(data)
+    type_ = payload.get("type")
+
+    if type_ == "init":
+        conn.nick = payload["name"]  # type: ignore
+        conn.channel = payload["group"]  # type: ignore
+        server.send(conn, {"type": "initFinished", "data": True})
+    elif type_ == "ping":
+        server.send(conn, {"type": "pong"})
+    elif type_ == "message":
+        server.message_id = getattr(server, "message_id", 0) + 1  # type: ignore
+        for other in server.connections:
+            if getattr(other, "channel", None) != payload["group"]:
+                continue
+            message = {
+                "messageId": server.message_id,  # type: ignore
+                "name": payload["name"],
+                "text": payload["text"],
+                "type": "sent" if other is conn else "received",
+            }
+            server.send(other, {"type": "message", "message": message})
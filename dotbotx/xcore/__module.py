@@ -1,33 +1,169 @@
 import asyncio
 from collections import defaultdict
+import inspect
+import logging
 import threading
-from typing import Awaitable, DefaultDict, List, Optional, Union
+from typing import Awaitable, DefaultDict, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Union
 
 from ..core import Chatter, Context, MessageCallback
-from ..module import Module
+from ..dispatch import ErrorHandler, InlineDispatcher, guard_callback
+from ..metrics import Metrics, instrument_callback
+from ..module import Module, reload_module
+
+# (sync callbacks, coroutine function callbacks), resolved at registration time.
+DispatchPlan = Tuple[Tuple[MessageCallback, ...], Tuple[MessageCallback, ...]]
+
+
+class _DispatchTable(NamedTuple):
+    # Published as a whole, so a frame never sees parts of two compilations.
+    plans: Dict[str, DispatchPlan]
+    default: DispatchPlan
+    wanted: Optional[FrozenSet[str]]
+
+
+_EMPTY_TABLE = _DispatchTable({}, ((), ()), frozenset())
+
+logger = logging.getLogger("dotbotx.xcore")
 
 
 class XChatter(Chatter):
-    def __init__(self, *args, **kwargs):
+    _table = _EMPTY_TABLE
+
+    def __init__(
+        self,
+        *args,
+        dispatcher: Optional[InlineDispatcher] = None,
+        max_tasks: Optional[int] = None,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
         self.callbacks: List[MessageCallback] = []
         self.typed_callbacks: DefaultDict[str, List[MessageCallback]] = defaultdict(
             list
         )
+        self.dispatcher = dispatcher
+        self.metrics: Optional[Metrics] = None
+        self._metric_labels: Dict[str, str] = {}
+
+        # Outstanding handler coroutines; beyond max_tasks new ones are dropped.
+        self.max_tasks = max_tasks
+        self.pending_tasks = 0
+        self.dropped_tasks = 0
+        self._tasks_lock = threading.Lock()
+        self._dropping = False
+
+        self.modules: List[Module] = []
+
+        self._table = _EMPTY_TABLE
+
+        self.message_callback = self.__message_callback
+
+    @property
+    def wanted_types(self) -> Optional[FrozenSet[str]]:
+        return self._table.wanted
+
+    @wanted_types.setter
+    def wanted_types(self, wanted: Optional[FrozenSet[str]]):
+        self._table = self._table._replace(wanted=wanted)
+
+    def __message_callback(self, ctx: Context):
+        plans, default_plan, _ = self._table
+        sync_callbacks, async_callbacks = plans.get(ctx.message.type, default_plan)
+
+        if sync_callbacks:
+            dispatcher = self.dispatcher
+            if dispatcher is None:
+                self.__call_sync(sync_callbacks, ctx)
+            elif dispatcher.ordered:
+                sender = ctx.message.sender
+                dispatcher.submit(
+                    lambda: self.__call_sync(sync_callbacks, ctx),
+                    sender.nick if sender else None,
+                )
+            else:
+                dispatcher.submit(lambda: self.__call_sync(sync_callbacks, ctx))
+
+        for callback in async_callbacks:
+            self._schedule(callback(ctx))  # type: ignore
+
+    def __call_sync(self, callbacks: Tuple[MessageCallback, ...], ctx: Context):
+        for callback in callbacks:
+            ret = callback(ctx)
+            # A plain function may still hand back an awaitable.
+            if ret is not None and inspect.isawaitable(ret):
+                self._schedule(ret)
+
+    def _schedule(self, coro: Awaitable):
+        with self._tasks_lock:
+            if self.max_tasks is not None and self.pending_tasks >= self.max_tasks:
+                self.dropped_tasks += 1
+                first_drop = not self._dropping
+                self._dropping = dropped = True
+            else:
+                self.pending_tasks += 1
+                self._dropping = dropped = False
+        if dropped:
+            if inspect.iscoroutine(coro):
+                coro.close()
+            if first_drop:
+                logger.warning("Task limit (%s) reached, dropping handlers", self.max_tasks)
+            return
+        self._submit(coro).add_done_callback(self.__task_done)
 
-        def message_callback(ctx: Context):
-            for callback in self.callbacks:
-                self.__call(callback, ctx)
+    def _submit(self, coro: Awaitable):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)  # type: ignore
 
-            for callback in self.typed_callbacks[ctx.message.type]:
-                self.__call(callback, ctx)
+    def __task_done(self, future):
+        with self._tasks_lock:
+            self.pending_tasks -= 1
+        # Exceptions of unguarded handlers would otherwise vanish with the future.
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Message handler raised", exc_info=future.exception())
 
-        self.message_callback = message_callback
+    def __compile(self):
+        metrics = self.metrics
 
-    def __call(self, func: MessageCallback, ctx: Context):
-        ret = func(ctx)
-        if isinstance(ret, Awaitable):
-            asyncio.run_coroutine_threadsafe(ret, self.loop)
+        def plan(callbacks: List[MessageCallback], message_type: str) -> DispatchPlan:
+            if metrics is not None:
+                # Instrumented wrappers only exist while metrics are enabled.
+                callbacks = [
+                    instrument_callback(
+                        metrics,
+                        c,
+                        message_type,
+                        **self._metric_labels,
+                    )
+                    for c in callbacks
+                ]
+            return (
+                tuple(c for c in callbacks if not asyncio.iscoroutinefunction(c)),
+                tuple(c for c in callbacks if asyncio.iscoroutinefunction(c)),
+            )
+
+        plans = {
+            message_type: plan(self.callbacks + callbacks, message_type)
+            for message_type, callbacks in self.typed_callbacks.items()
+        }
+        wanted: Optional[FrozenSet[str]] = None
+        if not self.callbacks:
+            wanted = frozenset(t for t, callbacks in self.typed_callbacks.items() if callbacks)
+        # One assignment, so the receiving thread always sees a complete table.
+        self._table = _DispatchTable(plans, plan(self.callbacks, "*"), wanted)
+
+    def set_metrics(self, metrics: Optional[Metrics], **labels: str):
+        self.metrics = metrics
+        self._metric_labels = labels
+        if metrics is not None:
+            # Scheduled handler coroutines, whether or not they have started yet.
+            metrics.gauge("dotbotx_async_backlog", lambda: self.pending_tasks, **labels)
+            dispatcher = self.dispatcher
+            if dispatcher is not None and hasattr(dispatcher, "queue_depth"):
+                metrics.gauge(
+                    "dotbotx_dispatch_queue_depth",
+                    lambda: dispatcher.queue_depth,  # type: ignore
+                    **labels,
+                )
+        self.__compile()
 
     def start(self):
         self.loop = asyncio.get_event_loop()
@@ -52,6 +188,20 @@ class XChatter(Chatter):
         self,
         callback: MessageCallback,
         message_type: Optional[Union[str, List[str]]] = None,
+        timeout: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        coalesce: bool = False,
+        on_error: Optional[ErrorHandler] = None,
+    ):
+        if timeout is not None or concurrency is not None or coalesce or on_error:
+            callback = guard_callback(callback, timeout, concurrency, coalesce, on_error)
+        self.__register(callback, message_type)
+        self.__compile()
+
+    def __register(
+        self,
+        callback: MessageCallback,
+        message_type: Optional[Union[str, List[str]]] = None,
     ):
         if message_type is None:
             self.callbacks.append(callback)
@@ -61,24 +211,73 @@ class XChatter(Chatter):
             for i in message_type:
                 self.typed_callbacks[i].append(callback)
 
-    def on(self, *message_types: str):
+    def on(self, *message_types: str, **options):
+        # options: timeout, concurrency, coalesce, on_error (see register_callback).
         def deco(func: MessageCallback):
             if len(message_types) == 0:
-                self.register_callback(func)
+                self.register_callback(func, **options)
             else:
-                for i in message_types:
-                    self.register_callback(func, i)
+                self.register_callback(func, list(message_types), **options)
             return func
 
         return deco
 
-    def apply(self, module: Module):
-        if hasattr(module, "before_apply"):
-            module.before_apply(self)  # type: ignore
+    def __unregister(self, module: Module):
+        for callback in module.callbacks:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
+        for message_type, callbacks in module.typed_callbacks.items():
+            registered = self.typed_callbacks.get(message_type)
+            if registered is None:
+                continue
+            for callback in callbacks:
+                if callback in registered:
+                    registered.remove(callback)
+            if not registered:
+                del self.typed_callbacks[message_type]
+
+    def __register_module(self, module: Module):
         for callback in module.callbacks:
-            self.register_callback(callback)
+            self.__register(callback)
         for message_type, callbacks in module.typed_callbacks.items():
             for callback in callbacks:
-                self.register_callback(callback, message_type)
+                self.__register(callback, message_type)
+
+    def apply(self, module: Module):
+        if hasattr(module, "before_apply"):
+            module.before_apply(self)  # type: ignore
+        self.__register_module(module)
+        self.modules.append(module)
+        self.__compile()
         if hasattr(module, "after_apply"):
             module.after_apply(self)  # type: ignore
+
+    def unapply(self, module: Module):
+        self.__unregister(module)
+        if module in self.modules:
+            self.modules.remove(module)
+        self.__compile()
+        if hasattr(module, "teardown"):
+            module.teardown(self)  # type: ignore
+
+    def replace(self, old: Module, new: Module):
+        # One compile for both changes, so no message sees neither module.
+        if hasattr(new, "before_apply"):
+            new.before_apply(self)  # type: ignore
+        self.__unregister(old)
+        self.__register_module(new)
+        if old in self.modules:
+            self.modules[self.modules.index(old)] = new
+        else:
+            self.modules.append(new)
+        self.__compile()
+        if hasattr(old, "teardown"):
+            old.teardown(self)  # type: ignore
+        if hasattr(new, "after_apply"):
+            new.after_apply(self)  # type: ignore
+
+    def reload(self, module: Module, **kwargs) -> Module:
+        # kwargs: source, name; see dotbotx.module.reload_module.
+        new = reload_module(module, **kwargs)
+        self.replace(module, new)
+        return new
@@ -1 +1,8 @@
-from .__module import apply_logging
\ No newline at end of file
+from .__module import (
+    BatchingFileHandler,
+    BatchingQueueListener,
+    JSONLFormatter,
+    LazyQueueHandler,
+    apply_logging,
+    apply_queue_logging,
+)
\ No newline at end of file
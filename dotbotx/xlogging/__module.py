@@ -1,5 +1,8 @@
 import logging
-from typing import Callable, Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
+from typing import Callable, List, Optional
+from ..codec import default_codec
 from ..core import Context
 from ..xcore import XChatter
 
@@ -24,7 +27,8 @@ def apply_logging(
 
     def _log_on_message(ctx: Context):
         if log_on_message is None:
-            logger.info(f"Received message: {ctx.message.raw_data}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Received message: %s", ctx.message.raw_data)
         else:
             log_on_message(logger, ctx)
 
@@ -32,10 +36,158 @@ def apply_logging(
 
     def send_hook(message: str):
         if log_on_send is None:
-            logger.info(f"Sent data: {message}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Sent data: %s", message)
         else:
             log_on_send(logger, message)
 
     chatter.connector.send_hooks.append(send_hook)
 
     return chatter
+
+
+class LazyQueueHandler(QueueHandler):
+    # QueueHandler.prepare() formats the record on the calling thread. Records
+    # here only carry immutable arguments, so leave formatting to the listener.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            return super().prepare(record)
+        return record
+
+
+class BatchingQueueListener(QueueListener):
+    def __init__(
+        self,
+        queue_,
+        *handlers: logging.Handler,
+        flush_interval: float = 1.0,
+        respect_handler_level: bool = True,
+    ):
+        super().__init__(queue_, *handlers, respect_handler_level=respect_handler_level)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        # Flush half-filled batches whenever the queue goes quiet.
+        while True:
+            try:
+                return self.queue.get(block, self.flush_interval)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+                if not block:
+                    raise
+
+    def stop(self):
+        super().stop()
+        for handler in self.handlers:
+            handler.flush()
+
+
+class BatchingFileHandler(RotatingFileHandler):
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        backup_count: int = 0,
+        batch_size: int = 256,
+        encoding: str = "utf-8",
+    ):
+        super().__init__(
+            filename,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding=encoding,
+            delay=True,
+        )
+        self.batch_size = batch_size
+        self._buffer: List[str] = []
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self._buffer.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if not self._buffer:
+                return
+            data = "".join(self._buffer)
+            self._buffer.clear()
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and self.stream.tell() + len(data) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(data)
+            self.stream.flush()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class JSONLFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__()
+        self.codec = default_codec()
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return self.codec.dumps(entry)
+
+
+def apply_queue_logging(
+    chatter: XChatter,
+    filename: Optional[str] = None,
+    jsonl: bool = False,
+    max_bytes: int = 0,
+    backup_count: int = 0,
+    batch_size: int = 256,
+    flush_interval: float = 1.0,
+    logger: Optional[logging.Logger] = None,
+    level: int = logging.INFO,
+    log_on_message: Optional[Callable[[logging.Logger, Context], None]] = None,
+    log_on_send: Optional[Callable[[logging.Logger, str], None]] = None,
+) -> BatchingQueueListener:
+    # The receiving and sending threads only put records on an unbounded
+    # queue; formatting and file I/O happen on the listener's thread.
+    if logger is None:
+        logger = logging.getLogger(
+            f"chatter.{chatter.nick}|{chatter.channel}|{str(id(chatter))[-3:]}"
+        )
+    logger.setLevel(level)
+    logger.propagate = False
+
+    if filename is None:
+        handler: logging.Handler = logging.StreamHandler()
+    else:
+        handler = BatchingFileHandler(filename, max_bytes, backup_count, batch_size)
+    if jsonl:
+        handler.setFormatter(JSONLFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("[%(asctime)s %(name)s:%(levelname)s] %(message)s")
+        )
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    logger.addHandler(LazyQueueHandler(records))
+    listener = BatchingQueueListener(records, handler, flush_interval=flush_interval)
+    listener.start()
+
+    apply_logging(chatter, logger, log_on_message, log_on_send)
+    return listener
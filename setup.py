@@ -4,5 +4,14 @@ setuptools.setup(
     name="dotbotx",
     version="1.0.2",
     author="xjzh123",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=["tests", "tests.*", "benchmarks"]),
+    install_requires=["websocket-client"],
+    extras_require={
+        # dotbotx.aio, dotbotx.hub, dotbotx.shard and dotbotx.testing
+        "async": ["websockets>=13"],
+        "orjson": ["orjson"],
+        "msgspec": ["msgspec"],
+        "ujson": ["ujson"],
+        "zstd": ["zstandard"],
+    },
 )
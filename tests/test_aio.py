@@ -0,0 +1,30 @@
+import asyncio
+
+from dotbotx.aio import AsyncChatter, AsyncHCConnector
+from dotbotx.testing import LocalServer, hc_responder
+
+
+def test_handler_error_does_not_end_session(caplog):
+    with LocalServer(hc_responder) as server:
+        chatter = AsyncChatter(AsyncHCConnector(server.url), "ch", "bot")
+        seen = []
+
+        @chatter.on("chat")
+        def handler(ctx):
+            seen.append(ctx.message.text)
+            if ctx.message.text == "boom":
+                raise ValueError("boom")
+
+        async def main():
+            task = asyncio.create_task(chatter.serve())
+            await asyncio.sleep(0.3)
+            server.broadcast({"cmd": "chat", "nick": "x", "text": "boom"})
+            server.broadcast({"cmd": "chat", "nick": "x", "text": "after"})
+            await asyncio.sleep(0.3)
+            assert not task.done()
+            chatter.quit()
+            await asyncio.wait_for(task, 2)
+
+        asyncio.run(main())
+        assert seen == ["boom", "after"]
+        assert "Error while handling frame" in caplog.text
@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+
+import pytest
+
+from dotbotx.archive import RECV, SEND, ArchiveReader, ArchiveWriter, ReplayConnector
+from dotbotx.xcore import XChatter
+
+FRAMES = [
+    (RECV, json.dumps({"cmd": "onlineSet", "nicks": ["alice"], "users": [{"nick": "alice"}]})),
+    (SEND, json.dumps({"cmd": "chat", "text": "hello"})),
+    (RECV, json.dumps({"cmd": "chat", "nick": "alice", "text": "hi"})),
+    (RECV, json.dumps({"cmd": "chat", "nick": "alice", "text": "bye"})),
+]
+
+
+def record(path, compression=None):
+    with ArchiveWriter(str(path), compression) as writer:
+        for direction, data in FRAMES:
+            writer.write(data, direction)
+    return str(path)
+
+
+def read(path, direction=None):
+    with ArchiveReader(path) as reader:
+        return [(frame.direction, frame.data) for frame in reader.frames(direction)]
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_round_trip(tmp_path, compression):
+    path = record(tmp_path / "trace.dbx", compression)
+    assert read(path) == FRAMES
+    assert read(path, RECV) == [f for f in FRAMES if f[0] == RECV]
+
+
+def test_zstd_round_trip(tmp_path):
+    pytest.importorskip("zstandard")
+    path = record(tmp_path / "trace.dbx", "zstd")
+    assert read(path) == FRAMES
+
+
+def test_appending_keeps_one_header(tmp_path):
+    path = record(tmp_path / "trace.dbx")
+    record(path)
+    assert read(path) == FRAMES * 2
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not an archive")
+    with pytest.raises(ValueError):
+        ArchiveReader(str(path))
+
+
+@pytest.mark.parametrize("cut", [1, 5, 20])
+def test_truncated_tail_is_skipped(tmp_path, caplog, cut):
+    path = record(tmp_path / "trace.dbx", "gzip")
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - cut)
+    with caplog.at_level(logging.WARNING, logger="dotbotx.archive"):
+        assert read(path) == FRAMES[:-1]
+    assert "incomplete record" in caplog.text
+
+
+def test_replay_feeds_received_frames(tmp_path):
+    path = record(tmp_path / "trace.dbx")
+    connector = ReplayConnector(path)
+    chatter = XChatter(connector, "ch", "bot")
+    seen = []
+    chatter.on("chat")(lambda ctx: seen.append(ctx.message.text))
+    connector.run_forever("ch", "bot")
+    assert seen == ["hi", "bye"]
+    # Sent frames are not replayed; onlineSet is skipped before decoding.
+    assert connector.replayed == 3
+    assert not connector.is_running
+
+
+def test_replay_records_sends(tmp_path):
+    connector = ReplayConnector(record(tmp_path / "trace.dbx"))
+    chatter = XChatter(connector, "ch", "bot")
+    sent = []
+    connector.send_hooks.append(sent.append)
+    chatter.on("chat")(lambda ctx: ctx.chatter.chat(f"re: {ctx.message.text}"))
+    connector.run_forever("ch", "bot")
+    assert [json.loads(s)["text"] for s in sent] == ["re: hi", "re: bye"]
+    assert connector.sent == 2
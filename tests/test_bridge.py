@@ -0,0 +1,91 @@
+import json
+import threading
+import time
+
+from dotbotx.bridge import Bridge
+from dotbotx.core import Context
+from dotbotx.hc import HCConnector
+from dotbotx.idns import IDNSConnector, IDNSMsg
+from dotbotx.keepalive import TimerWheel
+from dotbotx.outbound import Outbound
+from dotbotx.xcore import XChatter
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def make_bridge():
+    bridge = Bridge(message_types=("message",), wheel=TimerWheel())
+    source = XChatter(IDNSConnector("US", "test"), "a", "bot")
+    other = XChatter(IDNSConnector("US", "test"), "b", "bot")
+    bridge.link(source)
+    bridge.link(other)
+    return bridge, source, other
+
+
+def message(is_history):
+    raw = json.dumps(
+        {"type": "message", "message": {"name": "alice", "text": "hi", "type": "received"}}
+    )
+    return IDNSMsg(raw, is_history)
+
+
+def test_history_is_not_relayed():
+    bridge, source, other = make_bridge()
+    bridge.relay(Context(source, message(is_history=True)))
+    assert not bridge.targets[other].lines
+    bridge.close()
+
+
+def test_live_message_is_relayed():
+    bridge, source, other = make_bridge()
+    bridge.relay(Context(source, message(is_history=False)))
+    assert list(bridge.targets[other].lines) == ["[a] alice: hi"]
+    bridge.close()
+
+
+def test_slow_target_does_not_block_the_wheel():
+    wheel = TimerWheel()
+    bridge = Bridge(message_types=("message",), wheel=wheel, batch_interval=0.01)
+    source = XChatter(IDNSConnector("US", "test"), "a", "bot")
+    slow = XChatter(IDNSConnector("US", "test"), "b", "bot")
+    release = threading.Event()
+    sent = []
+
+    def send_chat(text):
+        release.wait(2)
+        sent.append(text)
+
+    slow.connector.send_chat = send_chat
+    bridge.link(source)
+    bridge.link(slow)
+    bridge.relay(Context(source, message(is_history=False)))
+
+    fired = threading.Event()
+    wheel.call_later(0.1, fired.set)
+    assert fired.wait(1)
+    release.set()
+    assert wait_until(lambda: sent == ["[a] alice: hi"])
+    assert bridge.targets[slow].sent == 1
+    bridge.close()
+
+
+def test_target_with_outbound_is_queued():
+    outbound = Outbound(rate=0.001, burst=1)
+    outbound.bucket.tokens = 0
+    bridge = Bridge(message_types=("message",), wheel=TimerWheel(), batch_interval=0.01)
+    source = XChatter(IDNSConnector("US", "test"), "a", "bot")
+    other = XChatter(HCConnector(outbound=outbound), "b", "bot")
+    bridge.link(source)
+    bridge.link(other)
+    bridge.relay(Context(source, message(is_history=False)))
+    assert wait_until(lambda: outbound.depth == 1)
+    assert bridge._sender is None
+    bridge.close()
+    outbound.clear()
@@ -0,0 +1,44 @@
+import pytest
+
+from dotbotx.abstract import AbstractCodec
+from dotbotx.codec import __module as codec_module
+from dotbotx.codec import JSONCodec, get_codec
+
+
+class MissingCodec(AbstractCodec):
+    name = "missing"
+    attempts = 0
+
+    def __init__(self):
+        MissingCodec.attempts += 1
+        raise ImportError("not installed")
+
+    def loads(self, data):
+        ...
+
+    def dumps(self, obj):
+        ...
+
+
+@pytest.fixture
+def missing_first(monkeypatch):
+    MissingCodec.attempts = 0
+    monkeypatch.setattr(codec_module, "CODECS", {"missing": MissingCodec, "json": JSONCodec})
+    monkeypatch.setattr(codec_module, "_instances", {})
+    monkeypatch.setattr(codec_module, "_default", None)
+
+
+def test_missing_codec_is_only_imported_once(missing_first):
+    for _ in range(100):
+        assert codec_module.default_codec().name == "json"
+    assert MissingCodec.attempts == 1
+    assert codec_module.available_codecs() == ["json"]
+    assert MissingCodec.attempts == 1
+
+
+def test_get_codec_reports_missing_codec(missing_first):
+    with pytest.raises(ImportError):
+        get_codec("missing")
+    with pytest.raises(ImportError):
+        get_codec("missing")
+    assert MissingCodec.attempts == 1
@@ -0,0 +1,128 @@
+import itertools
+import json
+import threading
+import time
+
+import pytest
+
+from dotbotx.core import Context
+from dotbotx.dispatch import PoolDispatcher
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.xcore import XChatter
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def blocked(dispatcher):
+    # Occupies the (single) worker until the returned event is set.
+    release = threading.Event()
+    started = threading.Event()
+
+    def job():
+        started.set()
+        release.wait(2)
+
+    dispatcher.submit(job)
+    assert started.wait(1)
+    return release
+
+
+def test_ordered_keeps_per_key_order():
+    dispatcher = PoolDispatcher(workers=4, ordered=True)
+    done = {key: [] for key in "abcd"}
+    for i in range(50):
+        for key in done:
+            dispatcher.submit(lambda key=key, i=i: done[key].append(i), key)
+    dispatcher.close()
+    assert all(seen == list(range(50)) for seen in done.values())
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [("drop_oldest", [2, 3]), ("drop_newest", [1, 2])],
+)
+def test_full_queue_policies(policy, expected):
+    dispatcher = PoolDispatcher(workers=1, max_queue=2, policy=policy)
+    release = blocked(dispatcher)
+    done = []
+    for i in (1, 2, 3):
+        dispatcher.submit(lambda i=i: done.append(i))
+    assert dispatcher.queue_depth == 2
+    release.set()
+    dispatcher.close()
+    assert done == expected
+    assert dispatcher.stats()["dropped"] == 1
+
+
+def test_block_policy_waits_for_room():
+    dispatcher = PoolDispatcher(workers=1, max_queue=1, policy="block")
+    release = blocked(dispatcher)
+    done = []
+    dispatcher.submit(lambda: done.append(1))
+    submitter = threading.Thread(target=lambda: dispatcher.submit(lambda: done.append(2)))
+    submitter.start()
+    submitter.join(0.1)
+    assert submitter.is_alive()
+    release.set()
+    submitter.join(1)
+    dispatcher.close()
+    assert done == [1, 2]
+    assert dispatcher.stats()["dropped"] == 0
+
+
+def test_close_drains_queued_jobs():
+    dispatcher = PoolDispatcher(workers=1)
+    release = blocked(dispatcher)
+    done = []
+    for i in range(5):
+        dispatcher.submit(lambda i=i: done.append(i))
+    release.set()
+    dispatcher.close(wait=True)
+    assert done == [0, 1, 2, 3, 4]
+    with pytest.raises(RuntimeError):
+        dispatcher.submit(lambda: None)
+
+
+def test_failing_job_is_counted_and_worker_survives():
+    dispatcher = PoolDispatcher(workers=1)
+    done = []
+    dispatcher.submit(lambda: 1 / 0)
+    dispatcher.submit(lambda: done.append(1))
+    dispatcher.close()
+    stats = dispatcher.stats()
+    assert (stats["failed"], stats["completed"], done) == (1, 2, [1])
+
+
+def test_slow_handler_does_not_block_receiving():
+    dispatcher = PoolDispatcher(workers=2, ordered=True)
+    chatter = XChatter(HCConnector(), "ch", "bot", dispatcher=dispatcher)
+    release = threading.Event()
+    seen = []
+
+    @chatter.on("chat")
+    def handler(ctx):
+        if ctx.message.text == "slow":
+            release.wait(2)
+        seen.append(ctx.message.text)
+
+    # A nick that lands on the other worker (str hashes are salted per run).
+    nicks = (f"user{i}" for i in itertools.count())
+    other = next(n for n in nicks if hash(n) % 2 != hash("alice") % 2)
+    started = time.monotonic()
+    for nick, text in (("alice", "slow"), ("alice", "after"), (other, "other")):
+        msg = HCMsg(json.dumps({"cmd": "chat", "nick": nick, "text": text}))
+        chatter.message_callback(Context(chatter, msg))
+    assert time.monotonic() - started < 0.5
+    # bob is not stuck behind alice's slow handler; alice's messages stay in order.
+    assert wait_until(lambda: "other" in seen)
+    assert "after" not in seen
+    release.set()
+    dispatcher.close()
+    assert seen.index("slow") < seen.index("after")
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+from dotbotx.core import Context
+from dotbotx.dispatch import guard_callback
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.xcore import XChatter
+
+CHATTER = XChatter(HCConnector(), "ch", "bot")
+
+
+def ctx(text="hi"):
+    return Context(CHATTER, HCMsg(json.dumps({"cmd": "chat", "nick": "alice", "text": text})))
+
+
+def test_timeout_cancels_and_reports():
+    errors = []
+    cancelled = []
+
+    async def slow(ctx):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    guarded = guard_callback(slow, timeout=0.01, on_error=lambda c, e: errors.append(e))
+    asyncio.run(guarded(ctx()))
+    assert cancelled == [True]
+    assert len(errors) == 1 and isinstance(errors[0], asyncio.TimeoutError)
+
+
+def test_concurrency_cap():
+    running = 0
+    peak = 0
+
+    async def handler(ctx):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    guarded = guard_callback(handler, concurrency=2)
+
+    async def main():
+        await asyncio.gather(*(guarded(ctx()) for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+
+
+def test_coalesce_handles_only_the_latest_pending_message():
+    handled = []
+
+    async def handler(ctx):
+        handled.append(ctx.message.text)
+        await asyncio.sleep(0.01)
+
+    guarded = guard_callback(handler, coalesce=True)
+
+    async def main():
+        first = asyncio.ensure_future(guarded(ctx("1")))
+        await asyncio.sleep(0)
+        await asyncio.gather(guarded(ctx("2")), guarded(ctx("3")), guarded(ctx("4")))
+        await first
+
+    asyncio.run(main())
+    assert handled == ["1", "4"]
+
+
+def test_on_error_gets_sync_and_async_failures():
+    errors = []
+
+    def on_error(ctx, exc):
+        errors.append((ctx.message.text, type(exc)))
+
+    def broken_sync(ctx):
+        raise KeyError("x")
+
+    async def broken_async(ctx):
+        raise ValueError("y")
+
+    assert guard_callback(broken_sync, on_error=on_error)(ctx("s")) is None
+    asyncio.run(guard_callback(broken_async, on_error=on_error)(ctx("a")))
+    assert errors == [("s", KeyError), ("a", ValueError)]
+
+
+def test_errors_are_logged_without_on_error(caplog):
+    async def broken(ctx):
+        raise ValueError("boom")
+
+    with caplog.at_level(logging.ERROR, logger="dotbotx.dispatch"):
+        asyncio.run(guard_callback(broken)(ctx()))
+    assert "failed on chat message" in caplog.text
+
+
+def test_async_only_options_are_rejected_for_sync_handlers():
+    with pytest.raises(ValueError):
+        guard_callback(lambda ctx: None, timeout=1)
+
+
+def test_register_with_options_guards_the_handler():
+    async def main():
+        chatter = XChatter(HCConnector(), "ch", "bot")
+        chatter.loop = asyncio.get_running_loop()
+        errors = []
+
+        @chatter.on("chat", timeout=0.01, on_error=lambda c, e: errors.append(type(e)))
+        async def slow(ctx):
+            await asyncio.sleep(10)
+
+        chatter.message_callback(ctx())
+        await asyncio.sleep(0.1)
+        assert errors == [asyncio.TimeoutError]
+        assert chatter.pending_tasks == 0
+
+    asyncio.run(main())
+
+
+def test_task_cap_drops_new_handlers():
+    async def main():
+        chatter = XChatter(HCConnector(), "ch", "bot", max_tasks=2)
+        chatter.loop = asyncio.get_running_loop()
+        release = asyncio.Event()
+        started = []
+
+        @chatter.on("chat")
+        async def handler(ctx):
+            started.append(ctx.message.text)
+            await release.wait()
+
+        for i in range(4):
+            chatter.message_callback(ctx(str(i)))
+        await asyncio.sleep(0.01)
+        assert started == ["0", "1"]
+        assert (chatter.pending_tasks, chatter.dropped_tasks) == (2, 2)
+        release.set()
+        await asyncio.sleep(0.01)
+        assert chatter.pending_tasks == 0
+
+    asyncio.run(main())
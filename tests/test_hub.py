@@ -0,0 +1,52 @@
+import socket
+import threading
+import time
+
+from dotbotx.aio import AsyncHCConnector
+from dotbotx.hub import Hub
+from dotbotx.testing import LocalServer, hc_responder
+
+
+def test_stop_right_after_start():
+    with LocalServer(hc_responder) as server:
+        for delay in (0, 0.001, 0.01, 0.05):
+            hub = Hub(stop_timeout=5)
+            hub.chatter(AsyncHCConnector(server.url), "ch", "bot")
+            hub.start()
+            time.sleep(delay)
+            started = time.monotonic()
+            hub.stop()
+            assert time.monotonic() - started < 2
+
+
+def test_loop_is_usable_as_soon_as_start_returns():
+    for _ in range(20):
+        hub = Hub()
+        hub.start()
+        assert hub.loop is not None
+        called = threading.Event()
+        hub.loop.call_soon_threadsafe(called.set)
+        stopper = threading.Thread(target=hub.stop, daemon=True)
+        stopper.start()
+        stopper.join(2)
+        assert not stopper.is_alive()
+        assert called.is_set()
+
+
+def test_stop_cancels_stuck_handshake():
+    # Accepts TCP connections but never answers the websocket handshake.
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    try:
+        port = listener.getsockname()[1]
+        hub = Hub(stop_timeout=0.3)
+        chatter = hub.chatter(AsyncHCConnector(f"ws://127.0.0.1:{port}"), "ch", "bot")
+        hub.start()
+        time.sleep(0.1)
+        started = time.monotonic()
+        hub.stop()
+        assert time.monotonic() - started < 2
+        assert not chatter.is_running
+    finally:
+        listener.close()
@@ -0,0 +1,59 @@
+import json
+import time
+
+from dotbotx.idns import IDNSConnector
+from dotbotx.testing import LocalServer, idns_responder
+from dotbotx.xcore import XChatter
+
+
+
+def wait_until(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def history_responder(server, conn, data):
+    # Replays two history messages before initFinished, like the portal does.
+    if json.loads(data).get("type") == "init":
+        for id_ in (1, 2):
+            message = {"messageId": id_, "name": "old", "text": f"h{id_}", "type": "received"}
+            server.send(conn, {"type": "message", "message": message})
+    idns_responder(server, conn, data)
+
+
+def test_each_frame_is_parsed_once():
+    with LocalServer(history_responder) as server:
+        connector = IDNSConnector("US", "ua", server.url)
+        chatter = XChatter(connector, "g", "bot")
+        parsed = []
+        parse_message = connector.parse_message
+
+        def counting_parse(data):
+            parsed.append(data)
+            return parse_message(data)
+
+        connector.parse_message = counting_parse
+        seen = []
+        chatter.on("message", "initFinished")(
+            lambda ctx: seen.append((ctx.message.type, ctx.message.is_history))
+        )
+        connector.start("g", "bot")
+        assert wait_until(lambda: connector.init_finished)
+        chatter.chat("live")
+        assert wait_until(lambda: len(seen) == 4)
+        connector.quit()
+
+        # One parse per frame; the keepalive pong is the only other frame.
+        assert len([data for data in parsed if '"pong"' not in data]) == 4
+        assert len(parsed) == len(set(parsed))
+        assert seen == [
+            ("message", True),
+            ("message", True),
+            ("initFinished", False),
+            ("message", False),
+        ]
+        assert connector._last_message_id == 1
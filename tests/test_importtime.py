@@ -0,0 +1,37 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_importtime():
+    path = os.path.join(ROOT, "benchmarks", "importtime.py")
+    spec = importlib.util.spec_from_file_location("importtime", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_import_time_within_budget():
+    _, results, failures = load_importtime().run(3)
+    assert not failures, results
+
+
+def test_star_import_without_async_extra():
+    # A plain websocket-client install has no websockets package.
+    probe = (
+        "import sys\n"
+        "sys.modules['websockets'] = None\n"
+        "from dotbotx import *\n"
+        "import dotbotx\n"
+        "try:\n"
+        "    dotbotx.hub\n"
+        "except ImportError as e:\n"
+        "    print(e)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, cwd=ROOT, check=True
+    )
+    assert "dotbotx[async]" in result.stdout
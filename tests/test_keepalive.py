@@ -0,0 +1,80 @@
+import threading
+import time
+
+from dotbotx.keepalive import Keepalive, Timer, TimerWheel
+
+
+class EagerWheel:
+    # Runs each callback on another thread right away and gives it a moment
+    # to finish before call_later returns, like a wheel thread that wins the race.
+    def __init__(self):
+        self.later = []
+
+    def call_later(self, delay, callback):
+        timer = Timer(time.monotonic() + delay, callback)
+        if delay:
+            self.later.append(timer)
+        else:
+            thread = threading.Thread(target=callback, daemon=True)
+            thread.start()
+            thread.join(0.1)
+        return timer
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_start_survives_tick_running_first():
+    wheel = EagerWheel()
+    pings = []
+    keepalive = Keepalive(lambda: pings.append(1), interval=30, wheel=wheel)
+    keepalive.start()
+    assert wait_until(lambda: pings)
+    assert keepalive.is_running
+    assert wait_until(lambda: len(wheel.later) == 1)
+    keepalive.stop()
+
+
+def test_pong_during_send_is_measured():
+    keepalive = Keepalive(lambda: keepalive.pong(), interval=30, wheel=TimerWheel())
+    keepalive.start()
+    assert wait_until(lambda: keepalive.pongs == 1)
+    assert keepalive.rtt is not None and keepalive.rtt < 1
+    keepalive.stop()
+
+
+def test_stop_cancels_ticks():
+    pings = []
+    keepalive = Keepalive(lambda: pings.append(1), interval=0.02, wheel=TimerWheel())
+    keepalive.start()
+    assert wait_until(lambda: len(pings) >= 2)
+    keepalive.stop()
+    assert not keepalive.is_running
+    count = len(pings)
+    time.sleep(0.1)
+    assert len(pings) == count
+
+
+def test_send_failure_stops_keepalive():
+    def fail():
+        raise RuntimeError("not connected")
+
+    keepalive = Keepalive(fail, interval=0.01, wheel=TimerWheel())
+    keepalive.start()
+    assert wait_until(lambda: not keepalive.is_running)
+    assert keepalive.pings == 0
+
+
+def test_uses_the_given_wheel():
+    wheel = TimerWheel()
+    keepalive = Keepalive(lambda: None, interval=30, wheel=wheel)
+    keepalive.start()
+    assert wait_until(lambda: keepalive.pings == 1)
+    assert len(wheel) == 1
+    keepalive.stop()
@@ -0,0 +1,33 @@
+import asyncio
+import json
+
+from dotbotx.core import Context
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.metrics import Metrics
+from dotbotx.xcore import XChatter
+
+
+def test_backlog_counts_tasks_not_yet_started():
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    metrics = Metrics()
+    chatter.set_metrics(metrics)
+    backlog = metrics.gauge("dotbotx_async_backlog")
+    started = []
+
+    @chatter.on("chat")
+    async def handler(ctx):
+        started.append(ctx)
+
+    loop = asyncio.new_event_loop()
+    chatter.loop = loop
+    msg = HCMsg(json.dumps({"cmd": "chat", "nick": "alice", "text": "hi"}))
+    for _ in range(3):
+        chatter.message_callback(Context(chatter, msg))
+    try:
+        # The loop is not running, so nothing has started yet.
+        assert backlog.get() == 3
+        loop.run_until_complete(asyncio.sleep(0.05))
+    finally:
+        loop.close()
+    assert len(started) == 3
+    assert backlog.get() == 0
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from dotbotx.outbound import PRIORITY_HIGH, PRIORITY_NORMAL, Outbound
+
+
+def make(**kwargs):
+    # Starts with an empty bucket, so everything put in the same instant is
+    # still queued when the first send happens.
+    outbound = Outbound(**kwargs)
+    outbound.bucket.tokens = 0
+    sent = []
+    lock = threading.Lock()
+
+    def send(payload):
+        with lock:
+            sent.append(payload["text"])
+
+    outbound.send = send
+    return outbound, sent
+
+
+def chat(text):
+    return {"cmd": "chat", "text": text}
+
+
+def test_rate_paces_sends():
+    outbound, sent = make(rate=20, burst=1)
+    started = time.monotonic()
+    for i in range(4):
+        outbound.put(chat(str(i)))
+    assert outbound.flush(2)
+    assert sent == ["0", "1", "2", "3"]
+    # Four tokens at 20/s, starting empty.
+    assert time.monotonic() - started >= 0.15
+
+
+def test_high_priority_goes_first():
+    outbound, sent = make(rate=50, burst=1)
+    outbound.put(chat("a"))
+    outbound.put(chat("b"))
+    outbound.put(chat("cmd"), PRIORITY_HIGH)
+    assert outbound.flush(2)
+    assert sent == ["cmd", "a", "b"]
+
+
+def test_coalesces_per_key():
+    outbound, sent = make(rate=50, burst=1, coalesce=True)
+    outbound.put(chat("a1"), coalesce_key="a")
+    outbound.put(chat("a2"), coalesce_key="a")
+    outbound.put(chat("b1"), coalesce_key="b")
+    outbound.put(chat("b2"), coalesce_key="b")
+    outbound.put(chat("a3"), coalesce_key="a")
+    assert outbound.flush(2)
+    assert sent == ["a1\na2", "b1\nb2", "a3"]
+    assert outbound.coalesced == 2
+
+
+def test_coalescing_respects_max_length():
+    outbound, sent = make(rate=50, burst=1, coalesce=True, max_length=5)
+    outbound.put(chat("abc"), coalesce_key="a")
+    outbound.put(chat("def"), coalesce_key="a")
+    assert outbound.flush(2)
+    assert sent == ["abc", "def"]
+
+
+def test_overflow_drops_oldest_of_lowest_priority():
+    outbound, sent = make(rate=50, burst=1, max_size=3)
+    outbound.put(chat("cmd"), PRIORITY_HIGH)
+    outbound.put(chat("a"))
+    outbound.put(chat("b"))
+    outbound.put(chat("c"))
+    assert outbound.flush(2)
+    assert sent == ["cmd", "b", "c"]
+    assert outbound.dropped == 1
+
+
+def test_overflow_never_evicts_higher_priority():
+    outbound, sent = make(rate=50, burst=1, max_size=2)
+    outbound.put(chat("cmd1"), PRIORITY_HIGH)
+    outbound.put(chat("cmd2"), PRIORITY_HIGH)
+    outbound.put(chat("chat"), PRIORITY_NORMAL)
+    assert outbound.flush(2)
+    assert sent == ["cmd1", "cmd2"]
+    assert outbound.dropped == 1
+
+
+def test_flush_times_out_while_rate_limited():
+    outbound, sent = make(rate=1, burst=1)
+    outbound.put(chat("a"))
+    outbound.put(chat("b"))
+    assert not outbound.flush(0.1)
+    assert outbound.depth == 2
+    assert outbound.clear() == [chat("a"), chat("b")]
+    assert outbound.flush(0)
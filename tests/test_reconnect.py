@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+
+from dotbotx.aio import AsyncChatter, AsyncHCConnector
+from dotbotx.hc import HCConnector
+from dotbotx.idns import IDNSConnector
+from dotbotx.reconnect import Backoff
+from dotbotx.testing import LocalServer, hc_responder, idns_responder
+from dotbotx.xcore import XChatter
+
+EVENTS = ("disconnected", "reconnecting", "resumed")
+
+
+def wait_until(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def joins(server, nick):
+    frames = [json.loads(frame) for frame in list(server.received)]
+    return sum(f.get("cmd") == "join" and f.get("nick") == nick for f in frames)
+
+
+def test_sync_resumes_after_kill():
+    with LocalServer(hc_responder) as server:
+        chatter = XChatter(HCConnector(server.url, reconnect=Backoff(0.05, 0.1)), "ch", "bot")
+        events = []
+        chatter.on(*EVENTS)(lambda ctx: events.append(ctx.message.type))
+        chatter.connector.start("ch", "bot")
+        assert wait_until(lambda: joins(server, "bot") == 1)
+
+        server.kill()
+        assert wait_until(lambda: "resumed" in events)
+        assert events == ["disconnected", "reconnecting", "resumed"]
+        assert joins(server, "bot") == 2
+        chatter.connector.quit()
+        chatter.connector._thread.join(2)
+        assert not chatter.connector._thread.is_alive()
+
+
+def test_sync_quit_during_backoff():
+    with LocalServer(hc_responder) as server:
+        chatter = XChatter(HCConnector(server.url, reconnect=Backoff(1, 1, jitter=0)), "ch", "bot")
+        events = []
+        chatter.on(*EVENTS)(lambda ctx: events.append(ctx.message.type))
+        chatter.connector.start("ch", "bot")
+        assert wait_until(lambda: joins(server, "bot") == 1)
+
+        server.kill()
+        assert wait_until(lambda: "reconnecting" in events)
+        started = time.monotonic()
+        chatter.connector.quit()
+        chatter.connector._thread.join(2)
+        assert not chatter.connector._thread.is_alive()
+        assert time.monotonic() - started < 0.5
+        time.sleep(1.2)
+        assert "resumed" not in events
+        assert joins(server, "bot") == 1
+        assert not chatter.is_running
+
+
+def test_async_resumes_and_quits_during_backoff():
+    with LocalServer(hc_responder) as server:
+        chatter = AsyncChatter(
+            AsyncHCConnector(server.url, reconnect=Backoff(1, 1, jitter=0)), "ch", "abot"
+        )
+        events = []
+        chatter.on(*EVENTS)(lambda ctx: events.append(ctx.message.type))
+
+        async def main():
+            task = asyncio.create_task(chatter.serve())
+            await asyncio.sleep(0.3)
+            server.kill()
+            while "reconnecting" not in events:
+                await asyncio.sleep(0.01)
+            chatter.quit()
+            await asyncio.wait_for(task, 0.5)
+
+        asyncio.run(main())
+        assert events == ["disconnected", "reconnecting"]
+        assert joins(server, "abot") == 1
+
+
+def test_async_resumes_after_kill():
+    with LocalServer(hc_responder) as server:
+        chatter = AsyncChatter(
+            AsyncHCConnector(server.url, reconnect=Backoff(0.05, 0.1)), "ch", "abot"
+        )
+        events = []
+        chatter.on(*EVENTS)(lambda ctx: events.append(ctx.message.type))
+
+        async def main():
+            task = asyncio.create_task(chatter.serve())
+            await asyncio.sleep(0.3)
+            server.kill()
+            while "resumed" not in events:
+                await asyncio.sleep(0.01)
+            chatter.quit()
+            await asyncio.wait_for(task, 2)
+
+        asyncio.run(main())
+        assert events == ["disconnected", "reconnecting", "resumed"]
+        assert joins(server, "abot") == 2
+
+
+def test_idns_resume_sends_last_message_id_and_quits_during_backoff():
+    with LocalServer(idns_responder) as server:
+        connector = IDNSConnector("US", "ua", server.url, reconnect=Backoff(0.05, 0.1, jitter=0))
+        chatter = XChatter(connector, "g", "bot")
+        events = []
+        chatter.on(*EVENTS)(lambda ctx: events.append(ctx.message.type))
+        connector.start("g", "bot")
+        assert wait_until(lambda: connector.init_finished)
+        chatter.chat("hello")
+        assert wait_until(lambda: connector._last_message_id != -1)
+
+        server.kill()
+        assert wait_until(lambda: "resumed" in events)
+        inits = [json.loads(f) for f in list(server.received) if '"init"' in f]
+        assert [i["lastMessageId"] for i in inits] == [-1, connector._last_message_id]
+
+        connector.reconnect = Backoff(1, 1, jitter=0)
+        server.kill()
+        assert wait_until(lambda: events.count("reconnecting") == 2)
+        connector.quit()
+        connector._thread.join(2)
+        assert not connector._thread.is_alive()
+        assert events.count("resumed") == 1
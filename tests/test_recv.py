@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+
+from dotbotx.core import Context
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.recv import (
+    Receiver,
+    apply_recv,
+    default_receiver,
+    receiver,
+    recv_ctx,
+    recv_msg,
+    recv_unwrap,
+)
+from dotbotx.xcore import XChatter
+
+
+def make_chatter():
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    chatter.loop = asyncio.get_running_loop()
+    return chatter, apply_recv(chatter)
+
+
+def feed(chatter, **data):
+    chatter.message_callback(Context(chatter, HCMsg(json.dumps(data))))
+
+
+async def started(coro):
+    task = asyncio.ensure_future(coro)
+    await asyncio.sleep(0)
+    return task
+
+
+def test_filters_by_type_nick_and_predicate():
+    async def main():
+        chatter, receiver = make_chatter()
+        whisper = await started(recv_ctx(chatter, "whisper", nick="alice"))
+        long_chat = await started(
+            recv_ctx(chatter, "chat", predicate=lambda ctx: len(ctx.message.text) > 3)
+        )
+        assert len(receiver) == 2
+        feed(chatter, cmd="chat", nick="alice", text="hi")
+        feed(chatter, cmd="info", type="whisper", **{"from": "bob"}, text="bob whispered: no")
+        feed(chatter, cmd="info", type="whisper", **{"from": "alice"}, text="alice whispered: yes")
+        feed(chatter, cmd="chat", nick="bob", text="hello")
+        assert (await whisper).message.text == "yes"
+        assert (await long_chat).message.text == "hello"
+        assert len(receiver) == 0
+
+    asyncio.run(main())
+
+
+def test_every_matching_waiter_gets_the_message():
+    async def main():
+        chatter, receiver = make_chatter()
+        first = await started(receiver.recv_msg("chat"))
+        second = await started(receiver.recv_msg())
+        feed(chatter, cmd="chat", nick="alice", text="hi")
+        assert (await first).text == (await second).text == "hi"
+
+    asyncio.run(main())
+
+
+def test_timeout_removes_waiter():
+    async def main():
+        chatter, receiver = make_chatter()
+        with pytest.raises(asyncio.TimeoutError):
+            await recv_ctx(chatter, "chat", timeout=0.01)
+        assert len(receiver) == 0
+        assert receiver._waiters == {}
+
+    asyncio.run(main())
+
+
+def test_cancellation_removes_waiter():
+    async def main():
+        chatter, receiver = make_chatter()
+        task = await started(receiver.recv_ctx("chat", nick="alice"))
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert len(receiver) == 0
+        # Nothing is left to resolve a cancelled future.
+        feed(chatter, cmd="chat", nick="alice", text="hi")
+
+    asyncio.run(main())
+
+
+def test_shared_receiver_waits_on_several_chatters():
+    async def main():
+        receiver = Receiver()
+        loop = asyncio.get_running_loop()
+        chatters = [XChatter(HCConnector(), ch, "bot") for ch in ("a", "b")]
+        for chatter in chatters:
+            chatter.loop = loop
+            apply_recv(chatter, receiver)
+        waiter = await started(receiver.recv_unwrap("chat"))
+        feed(chatters[1], cmd="chat", nick="alice", text="hi")
+        chatter, message = await waiter
+        assert chatter is chatters[1] and message.text == "hi"
+
+    asyncio.run(main())
+
+
+def test_messages_from_other_threads_hop_to_the_loop():
+    async def main():
+        chatter, receiver = make_chatter()
+        waiter = await started(receiver.recv_msg("chat"))
+        await asyncio.to_thread(feed, chatter, cmd="chat", nick="alice", text="hi")
+        assert (await asyncio.wait_for(waiter, 1)).text == "hi"
+
+    asyncio.run(main())
+
+
+def test_old_call_forms_still_work():
+    async def main():
+        chatter, _ = make_chatter()
+        with pytest.warns(DeprecationWarning):
+            waiter = await started(recv_msg())
+        feed(chatter, cmd="chat", nick="alice", text="hi")
+        assert (await waiter).text == "hi"
+
+        with pytest.warns(DeprecationWarning):
+            waiter = await started(recv_unwrap())
+        with pytest.warns(DeprecationWarning):
+            await receiver(Context(chatter, HCMsg(json.dumps({"cmd": "chat", "text": "x"}))))
+        assert (await waiter)[1].text == "x"
+        assert len(default_receiver) == 0
+
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+import importlib
+import json
+import sys
+
+import pytest
+
+from dotbotx.core import Context
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.xcore import XChatter
+
+PLUGIN = """
+from dotbotx.module import Module
+
+VERSION = {version!r}
+plugin = Module()
+
+
+@plugin.on("chat")
+def hello(ctx):
+    ctx.chatter.seen.append(VERSION + ":" + ctx.message.text)
+
+
+def teardown(chatter, version=VERSION):
+    chatter.seen.append("teardown " + version)
+
+
+plugin.teardown = teardown
+"""
+
+ENTRY = """
+from reload_plugin import plugin
+"""
+
+
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch):
+    (tmp_path / "reload_plugin.py").write_text(PLUGIN.format(version="v1"))
+    (tmp_path / "reload_entry.py").write_text(ENTRY)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    for name in ("reload_plugin", "reload_entry"):
+        sys.modules.pop(name, None)
+
+
+def feed(chatter, text):
+    raw = json.dumps({"cmd": "chat", "nick": "alice", "text": text})
+    chatter.message_callback(Context(chatter, HCMsg(raw)))
+
+
+def test_reload_picks_the_defining_module(plugin_dir, monkeypatch):
+    entry = importlib.import_module("reload_entry")
+    # The bot script usually does `from plugin import plugin` in __main__.
+    monkeypatch.setattr(sys.modules["__main__"], "plugin", entry.plugin, raising=False)
+
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    chatter.seen = []
+    chatter.apply(entry.plugin)
+    feed(chatter, "a")
+
+    # A longer source keeps the bytecode cache from serving the old version.
+    (plugin_dir / "reload_plugin.py").write_text(PLUGIN.format(version="v2-reloaded"))
+    new = chatter.reload(entry.plugin)
+    feed(chatter, "b")
+
+    assert new is sys.modules["reload_plugin"].plugin
+    assert new is not entry.plugin
+    assert chatter.modules == [new]
+    assert chatter.seen == ["v1:a", "teardown v1", "v2-reloaded:b"]
+
+
+def test_unapply_removes_handlers(plugin_dir):
+    plugin = importlib.import_module("reload_plugin").plugin
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    chatter.seen = []
+    chatter.apply(plugin)
+    chatter.unapply(plugin)
+    feed(chatter, "a")
+    assert chatter.seen == ["teardown v1"]
+    assert chatter.modules == []
@@ -0,0 +1,26 @@
+import json
+
+from dotbotx.core import Context
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.roster import Roster
+from dotbotx.xcore import XChatter
+
+
+def feed(roster, **data):
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    roster.update(Context(chatter, HCMsg(json.dumps(data))))
+
+
+def test_change_nick_renames_whole_nick():
+    roster = Roster()
+    feed(roster, cmd="onlineSet", users=[{"nick": "alice", "trip": "abc"}])
+    feed(roster, cmd="info", text="alice is now bobby")
+    assert roster.nicks == ("bobby",)
+    assert roster.get("bobby").trip == "abc"
+    assert roster.by_trip("abc")[0].nick == "bobby"
+
+
+def test_change_nick_needs_whole_text():
+    msg = HCMsg(json.dumps({"cmd": "info", "text": "alice is now bob"}))
+    assert msg.type == "changeNick"
+    assert msg.extras == {"oldNick": "alice", "newNick": "bob"}
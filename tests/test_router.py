@@ -0,0 +1,53 @@
+import json
+import re
+
+from dotbotx.core import Context
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.router import Router
+from dotbotx.xcore import XChatter
+
+
+def route(router, text):
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    raw = json.dumps({"cmd": "chat", "nick": "alice", "text": text})
+    router.route(Context(chatter, HCMsg(raw)))
+
+
+def test_first_registered_regex_wins():
+    router = Router()
+    hits = []
+    router.regex("world")(lambda ctx: hits.append("world"))
+    router.regex("hello")(lambda ctx: hits.append("hello"))
+    route(router, "hello world")
+    assert hits == ["world"]
+    assert router._matcher is not None
+
+
+def test_regex_match_keeps_own_groups():
+    router = Router()
+    seen = []
+    router.regex(r"nothing (\d+)")(lambda ctx: seen.append("wrong"))
+    router.regex(r"roll (\d+)d(?P<sides>\d+)")(
+        lambda ctx: seen.append((ctx.args, ctx.match.group(1), ctx.match.group("sides")))
+    )
+    route(router, "please roll 2d6 now")
+    assert seen == [(["2", "6"], "2", "6")]
+
+
+def test_numeric_backreference_still_matches():
+    router = Router()
+    hits = []
+    router.regex(r"(x)\1")(lambda ctx: hits.append(ctx.match.group(0)))
+    router.regex(r"(y)")(lambda ctx: hits.append("y"))
+    route(router, "axx")
+    assert hits == ["xx"]
+    assert router._matcher is None
+
+
+def test_anchors_and_flags():
+    router = Router()
+    hits = []
+    router.regex(r"^start")(lambda ctx: hits.append("start"))
+    router.regex(r"ShOuT", flags=re.I)(lambda ctx: hits.append("shout"))
+    route(router, "not start, shout")
+    assert hits == ["shout"]
@@ -0,0 +1,77 @@
+import json
+
+from dotbotx.hc import HCConnector
+from dotbotx.idns import IDNSConnector
+from dotbotx.metrics import apply_metrics
+from dotbotx.xcore import XChatter
+
+
+def counting(connector):
+    parsed = []
+    parse_message = connector.parse_message
+
+    def parse(data):
+        parsed.append(json.loads(data))
+        return parse_message(data)
+
+    connector.parse_message = parse
+    return parsed
+
+
+def receive(connector, **frame):
+    connector.message_callback(None, json.dumps(frame))
+
+
+def test_hc_skips_frames_nobody_handles():
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    apply_metrics(chatter)
+    parsed = counting(chatter.connector)
+    seen = []
+    chatter.on("chat", "whisper")(lambda ctx: seen.append(ctx.message.type))
+
+    receive(chatter.connector, cmd="onlineSet", nicks=[], users=[])
+    receive(chatter.connector, cmd="warn", text="slow down")
+    receive(chatter.connector, cmd="somethingNew")
+    receive(chatter.connector, cmd="chat", nick="alice", text="hi")
+    # "info" may turn out to be a whisper, so it is decoded.
+    receive(chatter.connector, cmd="info", type="whisper", **{"from": "bob"}, text="bob whispered: x")
+    receive(chatter.connector, cmd="info", text="just info")
+
+    assert [frame["cmd"] for frame in parsed] == ["chat", "info", "info"]
+    assert seen == ["chat", "whisper"]
+    assert chatter.connector.metrics.skipped.value == 3
+
+
+def test_hc_decodes_everything_for_catch_all_handlers():
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    parsed = counting(chatter.connector)
+    chatter.on("chat")(lambda ctx: None)
+    chatter.on()(lambda ctx: None)
+    assert chatter.wanted_types is None
+    receive(chatter.connector, cmd="warn", text="x")
+    receive(chatter.connector, cmd="somethingNew")
+    assert len(parsed) == 2
+
+
+def test_idns_keeps_bookkeeping_frames():
+    connector = IDNSConnector("US", "ua")
+    chatter = XChatter(connector, "g", "bot")
+    parsed = counting(connector)
+    pongs = []
+    connector.keepalive.pong = lambda: pongs.append(1)
+    seen = []
+    chatter.on("online")(lambda ctx: seen.append(ctx.message.type))
+
+    receive(connector, type="initFinished", data=True)
+    message = {"messageId": 5, "name": "alice", "text": "hi", "type": "received"}
+    receive(connector, type="message", message=message)
+    receive(connector, type="pong")
+    receive(connector, type="typing", name="alice")
+    receive(connector, type="online", users=[])
+
+    # Only "online" is dispatched, but init, message ids and pongs are tracked.
+    assert [frame["type"] for frame in parsed] == ["initFinished", "message", "pong", "online"]
+    assert seen == ["online"]
+    assert connector.init_finished
+    assert connector._last_message_id == 5
+    assert pongs == [1]
@@ -0,0 +1,177 @@
+import asyncio
+import json
+
+import pytest
+
+from dotbotx.core import Context
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.session import SessionManager, TTLStore
+from dotbotx.session import __module as session_module
+from dotbotx.xcore import XChatter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_module.time, "monotonic", clock)
+    return clock
+
+
+def test_ttl_store_evicts_least_recently_used():
+    store = TTLStore(max_size=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    assert store.get("a") == 1  # "b" is now the oldest
+    store.set("c", 3)
+    assert "b" not in store
+    assert (store.get("a"), store.get("c")) == (1, 3)
+
+
+def test_ttl_store_expires_idle_entries(clock):
+    store = TTLStore(ttl=10)
+    store.set("a", 1)
+    store.set("b", 2)
+    clock.now += 6
+    assert store.get("a") == 1  # access slides the TTL
+    clock.now += 6
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    store.set("c", 3)
+    clock.now += 11
+    assert store.expire() == 2
+    assert len(store) == 0
+
+
+def test_ttl_store_setdefault_and_pop():
+    store = TTLStore()
+    state = store.setdefault("a")
+    state["step"] = 1
+    assert store.setdefault("a") is state
+    assert store.pop("a") is state
+    assert store.pop("a", "gone") == "gone"
+
+
+def make_chatter(manager):
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    chatter.loop = asyncio.get_running_loop()
+    chatter.apply(manager)
+    sent = []
+    chatter.chat = sent.append
+    return chatter, sent
+
+
+def feed(chatter, nick, text, trip=None):
+    data = {"cmd": "chat", "nick": nick, "text": text}
+    if trip:
+        data["trip"] = trip
+    chatter.message_callback(Context(chatter, HCMsg(json.dumps(data))))
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_conversation_gets_only_its_users_messages():
+    async def main():
+        manager = SessionManager()
+        chatter, sent = make_chatter(manager)
+        answers = []
+
+        @manager.conversation
+        async def survey(session):
+            colour = await session.ask("Favourite colour?")
+            number = await session.ask("Favourite number?")
+            session.state["done"] = True
+            answers.append((colour, number))
+
+        @chatter.on("chat")
+        async def start(ctx):
+            if ctx.message.text == "!survey":
+                await survey(ctx)
+
+        feed(chatter, "alice", "!survey")
+        await settle()
+        assert len(manager.sessions) == 1
+        feed(chatter, "bob", "red")  # not in a conversation
+        feed(chatter, "alice", "blue")
+        await settle()
+        feed(chatter, "alice", "7")
+        await settle()
+        assert answers == [("blue", "7")]
+        assert sent == ["Favourite colour?", "Favourite number?"]
+        assert not manager.sessions
+        assert manager.state.get(("ch", "nick", "alice")) == {"done": True}
+
+    asyncio.run(main())
+
+
+def test_trip_keeps_session_across_nick_change():
+    async def main():
+        manager = SessionManager()
+        chatter, _ = make_chatter(manager)
+        msg = HCMsg(json.dumps({"cmd": "chat", "nick": "alice", "trip": "T", "text": "hi"}))
+        session = manager.open(Context(chatter, msg))
+        feed(chatter, "alice2", "still me", trip="T")
+        assert (await session.next(timeout=1)).message.text == "still me"
+        session.close()
+
+    asyncio.run(main())
+
+
+def test_idle_sessions_are_swept():
+    async def main():
+        manager = SessionManager(idle_timeout=0.05, sweep_interval=0.02)
+        chatter, _ = make_chatter(manager)
+
+        async def wait_forever(ctx):
+            async with manager.open(ctx) as session:
+                await session.next(timeout=10)
+
+        msg = HCMsg(json.dumps({"cmd": "chat", "nick": "alice", "text": "hi"}))
+        task = asyncio.ensure_future(wait_forever(Context(chatter, msg)))
+        await settle()
+        assert len(manager.sessions) == 1
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, 1)
+        assert not manager.sessions
+        manager.close()
+
+    asyncio.run(main())
+
+
+def test_max_sessions_cancels_the_oldest():
+    async def main():
+        manager = SessionManager(max_sessions=2)
+        chatter, _ = make_chatter(manager)
+        sessions = []
+        for nick in ("a", "b", "c"):
+            msg = HCMsg(json.dumps({"cmd": "chat", "nick": nick, "text": "hi"}))
+            sessions.append(manager.open(Context(chatter, msg)))
+        assert [s.closed for s in sessions] == [True, False, False]
+        assert [key[2] for key in manager.sessions] == ["b", "c"]
+        manager.close()
+
+    asyncio.run(main())
+
+
+def test_new_session_replaces_the_users_previous_one():
+    async def main():
+        manager = SessionManager()
+        chatter, _ = make_chatter(manager)
+        msg = HCMsg(json.dumps({"cmd": "chat", "nick": "alice", "text": "hi"}))
+        first = manager.open(Context(chatter, msg))
+        second = manager.open(Context(chatter, msg))
+        assert first.closed and not second.closed
+        assert manager.get(Context(chatter, msg)) is second
+        manager.close()
+
+    asyncio.run(main())
@@ -0,0 +1,30 @@
+import logging
+import os
+import time
+
+from dotbotx.aio import AsyncChatter, AsyncHCConnector
+from dotbotx.shard import Supervisor
+from dotbotx.shard.__module import _reload
+
+
+def crashing_bot():
+    os._exit(3)
+
+
+def test_crash_logs_exit_code(caplog):
+    supervisor = Supervisor(shards=1, start_method="fork", restart_delay=60)
+    supervisor.add("bot", crashing_bot)
+    with caplog.at_level(logging.WARNING, logger="dotbotx.shard"):
+        supervisor.start(timeout=0.2)
+        deadline = time.monotonic() + 3
+        while not caplog.records and time.monotonic() < deadline:
+            time.sleep(0.01)
+        supervisor.stop()
+    assert "exited with code 3" in caplog.records[0].getMessage()
+
+
+def test_reload_hands_config_to_async_chatter():
+    chatter = AsyncChatter(AsyncHCConnector(), "ch", "bot")
+    assert chatter.config is None
+    _reload(chatter, {"greeting": "hi"})
+    assert chatter.config == {"greeting": "hi"}
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from dotbotx.hc import HCMsg
+
+
+def parse(**data):
+    return HCMsg(json.dumps(data))
+
+
+def test_sender_hides_message_fields():
+    msg = parse(cmd="chat", nick="alice", trip="abc", userid=7, flair="*", text="hi", time=1)
+    sender = msg.sender
+    assert (sender.nick, sender.trip, sender.userid) == ("alice", "abc", 7)
+    # Fields nobody knew about still come through lazily.
+    assert sender.flair == "*"
+    assert sender.get("flair") == "*"
+    assert sender.get("text") is None
+    with pytest.raises(AttributeError):
+        sender.text
+    with pytest.raises(AttributeError):
+        sender.cmd
+
+
+def test_whisper_sender_nick_comes_from_from():
+    msg = parse(cmd="info", type="whisper", **{"from": "alice"}, text="alice whispered: psst")
+    assert msg.sender.nick == "alice"
+    assert msg.sender.get("from") is None
+
+
+def test_users_entries_keep_unknown_fields():
+    msg = parse(cmd="onlineSet", nicks=["bob"], users=[{"nick": "bob", "customField": 1}])
+    (user,) = msg.users
+    assert user.nick == "bob"
+    assert user.customField == 1
@@ -0,0 +1,31 @@
+import json
+
+from dotbotx.core import Context
+from dotbotx.hc import HCConnector, HCMsg
+from dotbotx.xcore import XChatter
+
+
+def test_registration_publishes_one_table():
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    assert chatter.wanted_types == frozenset()
+    before = chatter._table
+    chatter.on("chat")(lambda ctx: None)
+    table = chatter._table
+    assert table is not before
+    assert table.wanted == chatter.wanted_types == frozenset({"chat"})
+    assert set(table.plans) == {"chat"}
+
+    chatter.on()(lambda ctx: None)
+    assert chatter.wanted_types is None
+    assert len(chatter._table.default[0]) == 1
+
+
+def test_dispatch_uses_plan_for_type():
+    chatter = XChatter(HCConnector(), "ch", "bot")
+    seen = []
+    chatter.on("chat")(lambda ctx: seen.append("chat"))
+    chatter.on()(lambda ctx: seen.append("any"))
+    for cmd in ("chat", "onlineAdd"):
+        msg = HCMsg(json.dumps({"cmd": cmd, "nick": "alice", "text": "hi"}))
+        chatter.message_callback(Context(chatter, msg))
+    assert seen == ["any", "chat", "any"]